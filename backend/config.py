@@ -1,7 +1,6 @@
 """
 config.py — centralised settings loaded from .env
 """
-from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,6 +21,15 @@ class Settings(BaseSettings):
 
     # LLM (Large Language Model) - using Groq
     groq_api_key: str = ""
+    groq_rpm: int = 30      # requests per minute shared by all sessions
+    groq_tpm: int = 6000    # prompt tokens per minute shared by all sessions
+    groq_max_concurrency: int = 16  # Groq calls in flight at once, all sessions
+    groq_http_transport: str = "httpx"  # "aiohttp" needs openai[aiohttp]
+    groq_model: str = "llama-3.1-8b-instant"             # utterance analysis, summaries
+    groq_definition_model: str = "llama-3.1-8b-instant"  # short term definitions
+
+    # LLM - Gemini (services/gemini_info_service.py)
+    gemini_api_key: str = ""
     
     # Google Docs API
     google_docs_credentials: str = ""
@@ -40,6 +48,8 @@ class Settings(BaseSettings):
     )
 
 
-@lru_cache
+settings = Settings()
+
+
 def get_settings() -> Settings:
-    return Settings()
+    return settings
@@ -1,23 +1,55 @@
 """
 db/database.py — async SQLAlchemy engine + session factory
 """
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from config import get_settings
 
 settings = get_settings()
 
+# Keep SQLite connections (and their page caches) alive between requests.
+# In-memory databases are per-connection, so they must not be pooled.
+if settings.database_url.endswith(":memory:"):
+    _pool_kwargs: dict = {"poolclass": NullPool}
+else:
+    _pool_kwargs = {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_pre_ping": False,
+        "pool_recycle": -1,
+    }
+
 engine = create_async_engine(
     settings.database_url,
     echo=False,
     connect_args={"check_same_thread": False},
+    **_pool_kwargs,
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragma(dbapi_conn, _) -> None:
+    """Apply WAL + relaxed-sync PRAGMAs to every new SQLite connection."""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-64000")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.execute("PRAGMA foreign_keys=ON")
+    cur.close()
+
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False,
+    # Every caller commits explicitly; skip the implicit flush before each query
+    autoflush=False,
 )
 
 
@@ -37,3 +69,11 @@ async def init_db() -> None:
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips tables that already exist, indexes included
+        await conn.run_sync(_create_missing_indexes)
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
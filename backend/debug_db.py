@@ -3,7 +3,6 @@ import asyncio
 import os
 import sys
 import uuid
-from datetime import datetime
 
 # Add backend to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -25,20 +24,27 @@ async def main():
         print(f"Using lecture: {lecture.id}")
         
         print("--- Inserting 'Research' Badge Card ---")
-        card = Card(
-            id=str(uuid.uuid4()),
-            lecture_id=lecture.id,
-            type="deep_research", 
-            term="Research Term",
-            content="Research Content",
-            citations=[],
-            badge_type="Research", # This caused the crash before
-            lecture_timestamp_seconds=20,
-            created_at=datetime.utcnow()
-        )
-        db.add(card)
+        seed = [
+            ("Research Term", "Research Content", "Research", 20),  # "Research" badge caused the crash before
+        ]
+        cards = [
+            Card(
+                id=uuid.uuid4().hex,
+                lecture_id=lecture.id,
+                type="deep_research",
+                term=term,
+                content=content,
+                citations=[],
+                badge_type=badge_type,
+                lecture_timestamp_seconds=ts,
+            )
+            for term, content, badge_type, ts in seed
+        ]
+        # One transaction for the whole batch: add_all lets the flush emit a
+        # single batched INSERT and the commit pays one fsync, not one per row
+        db.add_all(cards)
         await db.commit()
-        print("Inserted Research card.")
+        print(f"Inserted {len(cards)} Research card(s).")
 
         print("--- Reading Back Cards ---")
         c_res = await db.execute(select(Card).where(Card.lecture_id == lecture.id))
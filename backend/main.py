@@ -3,23 +3,60 @@ main.py - FastAPI application entry point for lecRef backend
 """
 from __future__ import annotations
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 
-from db.database import init_db
+from db.database import engine, init_db
 from routers import lectures, research, tts, ws, docs
+from services.google_docs_service import get_google_docs_service
+from services.llm_clients import close_llm_clients, warm_up_llm_clients
+from services.tts_service import close_tts_client
 
 logging.basicConfig(
     level=logging.DEBUG,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
+logger = logging.getLogger(__name__)
 
+# ---------------------------------------------------------------------------
+# Lifespan: create DB tables, warm the connection pool, build singletons
+# ---------------------------------------------------------------------------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    # Open one pooled connection up front so the first request doesn't pay
+    # for the SQLite handshake and PRAGMA setup.
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    # Build the Docs/Drive clients once up front (credential load + discovery
+    # parse) so the first /api/docs/export doesn't pay for it.
+    try:
+        await asyncio.to_thread(get_google_docs_service)
+    except Exception as exc:
+        logger.warning("Google Docs warm-up failed: %s", exc)
+    # Connect to the LLM providers in the background; startup doesn't wait
+    llm_warm_up = asyncio.create_task(warm_up_llm_clients())
+    yield
+    llm_warm_up.cancel()
+    await close_llm_clients()
+    await close_tts_client()
+    await engine.dispose()
+
+
+# Keep the default response class: routes with a response_model are then
+# serialized straight to JSON bytes by pydantic-core (FastAPI >= 0.130).
+# A custom class such as ORJSONResponse would disable that fast path.
 app = FastAPI(
     title="lecRef API",
     description="Real-time AI lecture assistant backend",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ---------------------------------------------------------------------------
@@ -33,15 +70,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ---------------------------------------------------------------------------
-# Startup: create DB tables
-# ---------------------------------------------------------------------------
-
-@app.on_event("startup")
-async def on_startup() -> None:
-    await init_db()
-
-
 # ---------------------------------------------------------------------------
 # Routers
 # ---------------------------------------------------------------------------
@@ -60,3 +88,10 @@ app.include_router(docs.router)
 @app.get("/health", tags=["meta"])
 async def health():
     return {"status": "ok", "service": "lecref-backend"}
+
+
+@app.get("/health/llm-warmup", tags=["meta"])
+async def llm_warmup():
+    """Open the LLM provider connections now, e.g. from a deploy hook."""
+    await warm_up_llm_clients()
+    return {"status": "ok"}
@@ -6,7 +6,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 # ---------------------------------------------------------------------------
@@ -158,3 +158,43 @@ class TopicUpdateEvent(BaseModel):
     type: Literal["topic_update"] = "topic_update"
     topic: str
     emphasis_level: float = Field(ge=0.0, le=1.0)
+
+
+# ---------------------------------------------------------------------------
+# LLM structured output
+# ---------------------------------------------------------------------------
+
+class AnalyzedTerm(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    term: str = ""
+    type: Optional[str] = "concept"
+
+
+class AnalyzeResult(BaseModel):
+    """JSON object the analyze_utterance prompt asks the model for."""
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    terms: list[AnalyzedTerm] = Field(default_factory=list)
+    topic: Optional[str] = None
+    emphasis_level: float = 0.5
+    takeaway: Optional[str] = None
+    summary: Optional[str] = None
+
+    @field_validator("emphasis_level", mode="before")
+    @classmethod
+    def _emphasis_or_default(cls, value: Any) -> float:
+        try:
+            return float(value) if value is not None else 0.5
+        except (ValueError, TypeError):
+            return 0.5
+
+
+class TermDefinition(BaseModel):
+    term: str = ""
+    content: str = ""
+
+
+class DefinitionBatch(BaseModel):
+    """JSON object the batch definition prompts ask the model for."""
+    definitions: list[TermDefinition] = Field(default_factory=list)
@@ -1,5 +1,5 @@
 """
-models/lecture.py — ORM models for lectures, cards, and takeaways
+models/lecture.py — ORM models for lectures, cards, takeaways, and transcript chunks
 """
 import uuid
 from datetime import datetime, timezone
@@ -15,17 +15,33 @@ from sqlalchemy import (
     Text,
     func,
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, MappedColumn, mapped_column, relationship
 
 from db.database import Base
 
 
-def _now() -> datetime:
-    return datetime.now(timezone.utc)
+def _uuid() -> str:
+    return uuid.uuid4().hex
 
 
-def _uuid() -> str:
-    return str(uuid.uuid4())
+def utcnow() -> datetime:
+    """The one clock for created_at/updated_at: naive UTC with microseconds."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _timestamp(**kw) -> MappedColumn[datetime]:
+    # Stamped in Python rather than with SQLite's CURRENT_TIMESTAMP: rows the
+    # WebSocket handler sends before inserting need their created_at up
+    # front, and CURRENT_TIMESTAMP has whole seconds only, so mixing the two
+    # would misorder rows within a second. ``server_default`` only covers
+    # inserts made outside the ORM.
+    return mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=utcnow,
+        server_default=func.now(),
+        **kw,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -45,12 +61,8 @@ class Lecture(Base):
     summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     transcript: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     duration_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
-    created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, default=_now
-    )
-    updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, default=_now, onupdate=_now
-    )
+    created_at: Mapped[datetime] = _timestamp()
+    updated_at: Mapped[datetime] = _timestamp(onupdate=utcnow)
 
     cards: Mapped[list["Card"]] = relationship(
         "Card", back_populates="lecture", cascade="all, delete-orphan"
@@ -69,7 +81,7 @@ class Card(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
     lecture_id: Mapped[str] = mapped_column(
-        String, ForeignKey("lectures.id", ondelete="CASCADE"), nullable=False
+        String, ForeignKey("lectures.id", ondelete="CASCADE"), nullable=False, index=True
     )
     type: Mapped[str] = mapped_column(
         Enum("auto_define", "deep_research", "concept", name="card_type"),
@@ -86,9 +98,7 @@ class Card(Base):
         default="concept",
     )
     lecture_timestamp_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
-    created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, default=_now
-    )
+    created_at: Mapped[datetime] = _timestamp()
 
     lecture: Mapped["Lecture"] = relationship("Lecture", back_populates="cards")
 
@@ -102,12 +112,33 @@ class Takeaway(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
     lecture_id: Mapped[str] = mapped_column(
-        String, ForeignKey("lectures.id", ondelete="CASCADE"), nullable=False
+        String, ForeignKey("lectures.id", ondelete="CASCADE"), nullable=False, index=True
     )
     text: Mapped[str] = mapped_column(String, nullable=False)
     lecture_timestamp_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
-    created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, default=_now
-    )
+    created_at: Mapped[datetime] = _timestamp()
 
     lecture: Mapped["Lecture"] = relationship("Lecture", back_populates="takeaways")
+
+
+# ---------------------------------------------------------------------------
+# TranscriptChunk
+# ---------------------------------------------------------------------------
+
+class TranscriptChunk(Base):
+    """Text appended to a live lecture's transcript since the previous save.
+
+    Joined in ``seq`` order the chunks reproduce the transcript exactly; they
+    are folded into ``Lecture.transcript`` when the lecture is finalized.
+    Rows go away with their lecture through the ON DELETE CASCADE foreign key.
+    """
+
+    __tablename__ = "transcript_chunks"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
+    lecture_id: Mapped[str] = mapped_column(
+        String, ForeignKey("lectures.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = _timestamp()
@@ -4,38 +4,34 @@ routers/lectures.py — REST CRUD for lectures, cards, and takeaways
 from __future__ import annotations
 
 import io
-import json
-from datetime import datetime, timezone
-from typing import Optional
+from typing import AsyncIterator
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
 
 from db.database import get_db
 from models.events import (
-    CardOut,
     LectureCreate,
     LectureDetail,
     LectureOut,
     LecturePatch,
-    TakeawayOut,
 )
-from models.lecture import Card, Lecture, Takeaway
+from models.lecture import Card, Lecture, Takeaway, TranscriptChunk, utcnow
 
 router = APIRouter(prefix="/api/lectures", tags=["lectures"])
 
+_DETAIL_ADAPTER = TypeAdapter(LectureDetail)
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _now() -> datetime:
-    return datetime.now(timezone.utc)
-
-
 async def _get_lecture_or_404(lecture_id: str, db: AsyncSession) -> Lecture:
     result = await db.execute(select(Lecture).where(Lecture.id == lecture_id))
     lecture = result.scalar_one_or_none()
@@ -44,30 +40,122 @@ async def _get_lecture_or_404(lecture_id: str, db: AsyncSession) -> Lecture:
     return lecture
 
 
+async def _get_lecture_detail_or_404(lecture_id: str, db: AsyncSession) -> Lecture:
+    """Load a lecture with its cards and takeaways.
+
+    Collection sizes come back with the lecture row, so the extra SELECT per
+    collection is only issued when it has rows — a freshly created lecture
+    costs a single round trip. While a lecture is live (or if it was never
+    finalized) its transcript is assembled from the saved chunks.
+    """
+    n_cards = (
+        select(func.count(Card.id)).where(Card.lecture_id == Lecture.id).scalar_subquery()
+    )
+    n_takeaways = (
+        select(func.count(Takeaway.id)).where(Takeaway.lecture_id == Lecture.id).scalar_subquery()
+    )
+    n_chunks = (
+        select(func.count(TranscriptChunk.id))
+        .where(TranscriptChunk.lecture_id == Lecture.id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(Lecture, n_cards, n_takeaways, n_chunks).where(Lecture.id == lecture_id)
+    )
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+
+    lecture, card_count, takeaway_count, chunk_count = row
+    for attr, count in (("cards", card_count), ("takeaways", takeaway_count)):
+        if count:
+            await db.refresh(lecture, [attr])
+        else:
+            set_committed_value(lecture, attr, [])
+    if chunk_count:
+        chunks = await db.scalars(
+            select(TranscriptChunk.text)
+            .where(TranscriptChunk.lecture_id == lecture_id)
+            .order_by(TranscriptChunk.seq)
+        )
+        set_committed_value(lecture, "transcript", "".join(chunks))
+    return lecture
+
+
+def _select_lecture_with_count():
+    """SELECT each lecture together with its card count in one statement."""
+    return (
+        select(Lecture, func.count(Card.id).label("card_count"))
+        .outerjoin(Card)
+        .group_by(Lecture.id)
+    )
+
+
+def _lecture_out(lecture: Lecture, card_count: int) -> LectureOut:
+    d = LectureOut.model_validate(lecture)
+    d.card_count = card_count
+    return d
+
+
+def _lecture_detail(lecture: Lecture) -> LectureDetail:
+    """Validate a lecture with its loaded cards/takeaways in a single core pass."""
+    d = LectureDetail.model_validate(lecture)
+    d.card_count = len(d.cards)
+    return d
+
+
+def _citation_line(i: int, cit: dict) -> str:
+    url = cit.get("url", "")
+    return f"{i}. [{cit.get('title') or url}]({url})\n"
+
+
+async def _markdown_chunks(lecture: Lecture) -> AsyncIterator[bytes]:
+    """Yield a lecture's Markdown export section by section, one card at a time."""
+    yield f"# {lecture.title}\n".encode()
+    yield f"\n**Date:** {lecture.created_at.strftime('%Y-%m-%d %H:%M UTC')}\n".encode()
+    if lecture.summary:
+        yield f"\n## Summary\n\n{lecture.summary}\n".encode()
+    if lecture.takeaways:
+        yield b"\n## Key Takeaways\n\n"
+        for t in lecture.takeaways:
+            yield f"- {t.text}\n".encode()
+    if lecture.cards:
+        yield b"\n## Cards\n\n"
+        for card in lecture.cards:
+            parts = [f"### {card.term} `[{card.badge_type}]`\n\n{card.content}\n"]
+            if card.citations:
+                parts.append("\n**Citations:**\n\n")
+                parts.append("".join(
+                    _citation_line(i, cit) for i, cit in enumerate(card.citations, 1)
+                ))
+            parts.append("\n")
+            yield "".join(parts).encode()
+
+
 # ---------------------------------------------------------------------------
 # GET /api/lectures — list all
 # ---------------------------------------------------------------------------
 
 @router.get("/", response_model=list[LectureOut])
 async def list_lectures(db: AsyncSession = Depends(get_db)):
-    # Count cards per lecture in a subquery
-    card_count_sq = (
-        select(Card.lecture_id, func.count(Card.id).label("cnt"))
-        .group_by(Card.lecture_id)
-        .subquery()
-    )
+    # LectureOut never returns the transcript, so don't read it off disk
     stmt = (
-        select(Lecture, func.coalesce(card_count_sq.c.cnt, 0).label("card_count"))
-        .outerjoin(card_count_sq, Lecture.id == card_count_sq.c.lecture_id)
+        _select_lecture_with_count()
+        .options(
+            load_only(
+                Lecture.id,
+                Lecture.title,
+                Lecture.status,
+                Lecture.summary,
+                Lecture.duration_seconds,
+                Lecture.created_at,
+                Lecture.updated_at,
+            )
+        )
         .order_by(Lecture.updated_at.desc())
     )
     rows = (await db.execute(stmt)).all()
-    out = []
-    for lecture, card_count in rows:
-        d = LectureOut.model_validate(lecture)
-        d.card_count = card_count
-        out.append(d)
-    return out
+    return [_lecture_out(lecture, card_count) for lecture, card_count in rows]
 
 
 # ---------------------------------------------------------------------------
@@ -78,11 +166,9 @@ async def list_lectures(db: AsyncSession = Depends(get_db)):
 async def create_lecture(body: LectureCreate, db: AsyncSession = Depends(get_db)):
     lecture = Lecture(title=body.title)
     db.add(lecture)
+    # The timestamps are stamped in Python at flush, no refresh needed
     await db.commit()
-    await db.refresh(lecture)
-    d = LectureOut.model_validate(lecture)
-    d.card_count = 0
-    return d
+    return _lecture_out(lecture, 0)
 
 
 # ---------------------------------------------------------------------------
@@ -91,21 +177,9 @@ async def create_lecture(body: LectureCreate, db: AsyncSession = Depends(get_db)
 
 @router.get("/{lecture_id}", response_model=LectureDetail)
 async def get_lecture(lecture_id: str, db: AsyncSession = Depends(get_db)):
-    stmt = (
-        select(Lecture)
-        .where(Lecture.id == lecture_id)
-        .options(selectinload(Lecture.cards), selectinload(Lecture.takeaways))
-    )
-    result = await db.execute(stmt)
-    lecture = result.scalar_one_or_none()
-    if not lecture:
-        raise HTTPException(status_code=404, detail="Lecture not found")
+    lecture = await _get_lecture_detail_or_404(lecture_id, db)
 
-    d = LectureDetail.model_validate(lecture)
-    d.card_count = len(lecture.cards)
-    d.cards = [CardOut.model_validate(c) for c in lecture.cards]
-    d.takeaways = [TakeawayOut.model_validate(t) for t in lecture.takeaways]
-    return d
+    return _lecture_detail(lecture)
 
 
 # ---------------------------------------------------------------------------
@@ -120,16 +194,18 @@ async def patch_lecture(
     update_data = body.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(lecture, field, value)
-    lecture.updated_at = _now()
+    # Touched explicitly: onupdate only fires when some column changed, and a
+    # PATCH always counts as an update, even an empty or unchanged one
+    lecture.updated_at = utcnow()
     await db.commit()
-    await db.refresh(lecture)
-    d = LectureOut.model_validate(lecture)
-    # Fetch card count separately
-    cnt_result = await db.execute(
-        select(func.count(Card.id)).where(Card.lecture_id == lecture_id)
+    # Reload the lecture and its card count in a single round trip
+    stmt = (
+        _select_lecture_with_count()
+        .where(Lecture.id == lecture_id)
+        .execution_options(populate_existing=True)
     )
-    d.card_count = cnt_result.scalar_one() or 0
-    return d
+    lecture, card_count = (await db.execute(stmt)).one()
+    return _lecture_out(lecture, card_count)
 
 
 # ---------------------------------------------------------------------------
@@ -153,55 +229,22 @@ async def export_lecture(
     format: str = Query(default="json", pattern="^(json|markdown)$"),
     db: AsyncSession = Depends(get_db),
 ):
-    stmt = (
-        select(Lecture)
-        .where(Lecture.id == lecture_id)
-        .options(selectinload(Lecture.cards), selectinload(Lecture.takeaways))
-    )
-    result = await db.execute(stmt)
-    lecture = result.scalar_one_or_none()
-    if not lecture:
-        raise HTTPException(status_code=404, detail="Lecture not found")
+    lecture = await _get_lecture_detail_or_404(lecture_id, db)
 
     if format == "json":
-        payload = LectureDetail.model_validate(lecture).model_dump(mode="json")
-        payload["card_count"] = len(lecture.cards)
-        payload["cards"] = [CardOut.model_validate(c).model_dump(mode="json") for c in lecture.cards]
-        payload["takeaways"] = [TakeawayOut.model_validate(t).model_dump(mode="json") for t in lecture.takeaways]
-        content = json.dumps(payload, indent=2, default=str)
+        # Serialize straight from the validated model to bytes (no dict pass)
+        content = _DETAIL_ADAPTER.dump_json(_lecture_detail(lecture), indent=2)
         media_type = "application/json"
         filename = f"lecture_{lecture_id}.json"
         return StreamingResponse(
-            io.BytesIO(content.encode()),
+            io.BytesIO(content),
             media_type=media_type,
             headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
 
-    # Markdown export
-    lines: list[str] = []
-    lines.append(f"# {lecture.title}")
-    lines.append(f"\n**Date:** {lecture.created_at.strftime('%Y-%m-%d %H:%M UTC')}")
-    if lecture.summary:
-        lines.append(f"\n## Summary\n\n{lecture.summary}")
-    if lecture.takeaways:
-        lines.append("\n## Key Takeaways\n")
-        for t in lecture.takeaways:
-            lines.append(f"- {t.text}")
-    if lecture.cards:
-        lines.append("\n## Cards\n")
-        for card in lecture.cards:
-            lines.append(f"### {card.term} `[{card.badge_type}]`\n")
-            lines.append(card.content)
-            if card.citations:
-                lines.append("\n**Citations:**\n")
-                for i, cit in enumerate(card.citations, 1):
-                    lines.append(f"{i}. [{cit.get('title', cit.get('url', ''))}]({cit.get('url', '')})")
-            lines.append("")
-
-    content = "\n".join(lines)
     filename = f"lecture_{lecture_id}.md"
     return StreamingResponse(
-        io.BytesIO(content.encode()),
+        _markdown_chunks(lecture),
         media_type="text/markdown",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
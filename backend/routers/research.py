@@ -5,7 +5,6 @@ from __future__ import annotations
 
 import logging
 import uuid
-from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,16 +12,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from db.database import get_db
 from models.events import CardOut, DeepResearchRequest
 from models.lecture import Card, Lecture
-from services.groq_info_service import deep_research
+from services.hedged_info_service import deep_research
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/research", tags=["research"])
 
 
-def _now() -> datetime:
-    return datetime.now(timezone.utc)
-
-
 @router.post("/deep", response_model=CardOut, status_code=201)
 async def deep_research_endpoint(
     body: DeepResearchRequest, db: AsyncSession = Depends(get_db)
@@ -43,7 +38,7 @@ async def deep_research_endpoint(
         raise HTTPException(status_code=502, detail="Deep research returned no results")
 
     card = Card(
-        id=str(uuid.uuid4()),
+        id=uuid.uuid4().hex,
         lecture_id=body.lecture_id,
         type="deep_research",
         term=research_result["term"],
@@ -51,10 +46,9 @@ async def deep_research_endpoint(
         citations=research_result.get("citations", []),
         badge_type=research_result.get("badge_type", "concept"),
         lecture_timestamp_seconds=0,
-        created_at=_now(),
     )
     db.add(card)
+    # created_at is stamped in Python at flush, no refresh needed
     await db.commit()
-    await db.refresh(card)
 
     return CardOut.model_validate(card)
@@ -9,7 +9,7 @@ from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from services.tts_service import synthesize_speech
+from services.tts_service import stream_speech
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/tts", tags=["tts"])
@@ -34,20 +34,28 @@ async def tts_endpoint(body: TTSRequest):
             status_code=400,
         )
 
-    logger.info(f"[TTS Router] Calling synthesize_speech service")
-    audio_bytes = await synthesize_speech(body.text)
-    
-    if not audio_bytes:
-        logger.error(f"[TTS Router] synthesize_speech returned None/empty")
+    logger.info(f"[TTS Router] Calling stream_speech service")
+    audio = stream_speech(body.text)
+    # Wait for the first piece so a failed synthesis still gets a 500,
+    # then stream the rest as it is synthesized
+    first = await anext(audio, None)
+
+    if not first:
+        logger.error(f"[TTS Router] stream_speech returned no audio")
         return StreamingResponse(
             iter(b""),
             media_type="audio/wav",
             status_code=500,
         )
 
-    logger.info(f"[TTS Router] Returning audio response with {len(audio_bytes)} bytes")
+    async def body_chunks():
+        yield first
+        async for chunk in audio:
+            yield chunk
+
+    logger.info(f"[TTS Router] Streaming audio response")
     return StreamingResponse(
-        iter([audio_bytes]),
+        body_chunks(),
         media_type="audio/wav",
         headers={"Content-Disposition": "inline; filename=audio.wav"},
     )
@@ -19,45 +19,61 @@ Message flow:
     - new_takeaway
     - summary_update
     - topic_update
+    - batch { items: [...] } — several of the above coalesced into one frame
 """
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import time
 import uuid
-from datetime import datetime, timezone
 from typing import Optional
 
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, select, update
 
 from db.database import AsyncSessionLocal
-from models.lecture import Card, Lecture, Takeaway
-from services.cache import drop_session_cache, get_session_cache
+from models.lecture import Card, Lecture, Takeaway, TranscriptChunk, utcnow
+from services.cache import (
+    TermCache,
+    drop_session_cache,
+    get_session_cache,
+    near_duplicate_key,
+    normalise_term,
+)
+from services.convex_service import get_convex_service
 from services.smallest_service import close_session, get_or_create_session
 from services.extractor import (
     analyze_utterance,
-    generate_summary,
+    coalesce_stream,
+    stream_summary,
 )
-from services.groq_info_service import auto_define_batch, deep_research
+from services.hedged_info_service import auto_define_batch, deep_research
+from services.ratelimit import estimate_tokens, get_groq_bucket
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["websocket"])
 
 SUMMARY_INTERVAL_SECONDS = 60
-
-
-def _now() -> datetime:
-    return datetime.now(timezone.utc)
+OUT_QUEUE_MAX = 1000   # pending outbound frames per connection (backpressure)
+OUT_BATCH_MAX = 64     # max payloads coalesced into one "batch" frame
+INTERIM_DRAIN_MAX = 32 # max STT results taken from interim_queue per wake
+DB_BATCH_MAX = 64      # max queued writes committed in one transaction
+DR_QUEUE_MAX = 8       # pending user deep-research requests per connection
+RESEARCH_PREFETCH_MAX = 2            # newly defined terms researched ahead of a click
+RESEARCH_PREFETCH_DELAY_SECONDS = 0.5
+RESEARCH_PREFETCH_SPARE_REQUESTS = 5 # Groq quota left untouched by prefetching
 
 
 # ---------------------------------------------------------------------------
-# DB helpers (use a fresh session per operation to avoid thread conflicts)
+# DB helpers (use a fresh session per operation to avoid thread conflicts).
+# Card and takeaway rows are built here as plain column dicts and inserted
+# by the connection's db_writer task with Core statements, so they are sent
+# to the frontend before they are saved.
 # ---------------------------------------------------------------------------
 
-async def _save_card(
+def _new_card(
     lecture_id: str,
     card_type: str,
     term: str,
@@ -67,100 +83,89 @@ async def _save_card(
     timestamp_seconds: int,
     sources: list = None,
 ) -> dict:
+    """Column values for a new card row — also the card payload sent to the frontend."""
+    return {
+        "id": uuid.uuid4().hex,
+        "lecture_id": lecture_id,
+        "type": card_type,
+        "term": term,
+        "content": content,
+        "citations": citations or [],
+        "sources": sources or [],
+        "badge_type": badge_type,
+        "lecture_timestamp_seconds": timestamp_seconds,
+        "created_at": utcnow(),
+    }
+
+
+def _new_takeaway(lecture_id: str, text: str, timestamp_seconds: int) -> dict:
+    """Column values for a new takeaway row — also its frontend payload."""
+    return {
+        "id": uuid.uuid4().hex,
+        "lecture_id": lecture_id,
+        "text": text,
+        "lecture_timestamp_seconds": timestamp_seconds,
+        "created_at": utcnow(),
+    }
+
+
+async def _deep_research_limited(term: str, context: str) -> Optional[dict]:
+    """deep_research, once the shared Groq quota has room for it."""
+    # Only this much context reaches the model; slicing it here once makes
+    # the providers' own [:400] a no-op instead of a copy each
+    context = context[:400]
+    await get_groq_bucket().acquire(estimate_tokens(term, context))
+    return await deep_research(term, context)
+
+
+async def _finalize_lecture(
+    lecture_id: str, duration_seconds: int, summary: Optional[str], unsaved_transcript: str
+) -> None:
+    """Mark the lecture completed and fold its transcript into the lecture row.
+
+    The transcript is every saved chunk in seq order, including any left by
+    an earlier connection that crashed, followed by `unsaved_transcript`,
+    the text this connection has not saved as a chunk yet. The chunks are
+    deleted in the same transaction.
+    """
     async with AsyncSessionLocal() as db:
-        card = Card(
-            id=str(uuid.uuid4()),
-            lecture_id=lecture_id,
-            type=card_type,
-            term=term,
-            content=content,
-            citations=citations,
-            sources=sources or [],
-            badge_type=badge_type,
-            lecture_timestamp_seconds=timestamp_seconds,
-            created_at=_now(),
-        )
-        db.add(card)
-        await db.commit()
-        await db.refresh(card)
-        return {
-            "id": card.id,
-            "lecture_id": card.lecture_id,
-            "type": card.type,
-            "term": card.term,
-            "content": card.content,
-            "citations": card.citations or [],
-            "sources": card.sources or [],
-            "badge_type": card.badge_type,
-            "lecture_timestamp_seconds": card.lecture_timestamp_seconds,
-            "created_at": card.created_at.isoformat(),
-        }
-
-
-
-async def _save_takeaway(lecture_id: str, text: str, timestamp_seconds: int) -> dict:
-    async with AsyncSessionLocal() as db:
-        takeaway = Takeaway(
-            id=str(uuid.uuid4()),
-            lecture_id=lecture_id,
-            text=text,
-            lecture_timestamp_seconds=timestamp_seconds,
-            created_at=_now(),
-        )
-        db.add(takeaway)
-        await db.commit()
-        await db.refresh(takeaway)
-        return {
-            "id": takeaway.id,
-            "lecture_id": takeaway.lecture_id,
-            "text": takeaway.text,
-            "lecture_timestamp_seconds": takeaway.lecture_timestamp_seconds,
-            "created_at": takeaway.created_at.isoformat(),
-        }
-
-
-async def _save_transcript_chunk(lecture_id: str, transcript: str) -> None:
-    """Update the running transcript in the DB."""
-    async with AsyncSessionLocal() as db:
-        from sqlalchemy import update
-        await db.execute(
-            update(Lecture)
-            .where(Lecture.id == lecture_id)
-            .values(transcript=transcript, updated_at=_now())
-        )
-        await db.commit()
-
-
-async def _update_lecture_summary(lecture_id: str, summary: str) -> None:
-    async with AsyncSessionLocal() as db:
-        from sqlalchemy import select, update
-
-        await db.execute(
-            update(Lecture)
-            .where(Lecture.id == lecture_id)
-            .values(summary=summary, updated_at=_now())
-        )
-        await db.commit()
-
-
-async def _finalize_lecture(lecture_id: str, duration_seconds: int, summary: Optional[str], transcript: Optional[str]) -> None:
-    async with AsyncSessionLocal() as db:
-        from sqlalchemy import update
-
         values: dict = {
             "status": "completed",
             "duration_seconds": duration_seconds,
-            "updated_at": _now()
         }
         if summary:
             values["summary"] = summary
+        chunks = (await db.scalars(
+            select(TranscriptChunk.text)
+            .where(TranscriptChunk.lecture_id == lecture_id)
+            .order_by(TranscriptChunk.seq)
+        )).all()
+        transcript = "".join(chunks)
+        tail = unsaved_transcript.lstrip()
+        if tail:
+            transcript = f"{transcript} {tail}" if transcript else tail
         if transcript:
             values["transcript"] = transcript
-            
+
         await db.execute(update(Lecture).where(Lecture.id == lecture_id).values(**values))
+        if chunks:
+            await db.execute(delete(TranscriptChunk).where(TranscriptChunk.lecture_id == lecture_id))
         await db.commit()
 
 
+async def _next_transcript_seq(lecture_id: str) -> int:
+    """First free chunk seq for the lecture.
+
+    A reconnect after a crash finds the previous connection's chunks still
+    saved; numbering on from them keeps the seq order the text order.
+    """
+    async with AsyncSessionLocal() as db:
+        last = await db.scalar(
+            select(func.max(TranscriptChunk.seq)).where(TranscriptChunk.lecture_id == lecture_id)
+        )
+    return 0 if last is None else last + 1
+
+
 # ---------------------------------------------------------------------------
 # WebSocket handler
 # ---------------------------------------------------------------------------
@@ -171,43 +176,139 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
     logger.info("[%s] WebSocket connected", lecture_id)
 
     loop = asyncio.get_event_loop()
+    logger.debug("[%s] Event loop: %s", lecture_id, type(loop).__name__)
     stt_session = get_or_create_session(lecture_id, loop)
     term_cache = get_session_cache(lecture_id)
+    # Deep-research results, so repeat or overlapping requests share one call
+    research_cache = TermCache(maxsize=64)
 
     last_summary_time = time.time()
     session_active = True
     deep_research_cache: set[str] = set()  # track already-researched topics
     last_deep_research_time = 0.0
+    last_summary: Optional[str] = None  # whitespace-collapsed, to skip repeats
+    transcript_saved_count = 0  # utterances already saved as transcript chunks
+    prefetch_tasks: set[asyncio.Task] = set()
+
+    # All outbound frames go through one queue drained by a single writer,
+    # which coalesces whatever has piled up into one "batch" frame.
+    out_queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=OUT_QUEUE_MAX)
 
     async def send_json(payload: dict) -> None:
-        try:
-            await websocket.send_text(json.dumps(payload))
-        except Exception:
-            pass
+        await out_queue.put(payload)
+
+    async def ws_writer():
+        while True:
+            batch = [await out_queue.get()]
+            while len(batch) < OUT_BATCH_MAX:
+                try:
+                    batch.append(out_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            message = batch[0] if len(batch) == 1 else {"type": "batch", "items": batch}
+            try:
+                await websocket.send_text(orjson.dumps(message).decode())
+            except Exception:
+                pass
+            finally:
+                for _ in batch:
+                    out_queue.task_done()
+
+    # New rows and live-summary updates are persisted by a single
+    # writer task so the pipeline never waits on the DB before sending.
+    db_queue: asyncio.Queue[tuple[type, dict]] = asyncio.Queue()
+
+    def queue_write(model: type, values: dict) -> None:
+        """Queue a row insert into `model`'s table, or for `Lecture`, an
+        update of this lecture's columns (the live summary)."""
+        db_queue.put_nowait((model, values))
+
+    async def db_writer():
+        while True:
+            jobs = [await db_queue.get()]
+            while len(jobs) < DB_BATCH_MAX:
+                try:
+                    jobs.append(db_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            inserts: dict[type, list[dict]] = {}
+            lecture_values: dict = {}
+            for model, values in jobs:
+                if model is Lecture:
+                    lecture_values.update(values)  # later updates win
+                else:
+                    inserts.setdefault(model, []).append(values)
+            try:
+                # One transaction per batch and one Core INSERT per table
+                async with AsyncSessionLocal() as db:
+                    for model, rows in inserts.items():
+                        await db.execute(insert(model), rows)
+                    if lecture_values:
+                        await db.execute(
+                            update(Lecture).where(Lecture.id == lecture_id).values(**lecture_values)
+                        )
+                    await db.commit()
+            except Exception as exc:
+                logger.error("[%s] ❌ DB write error: %s", lecture_id, exc)
+            finally:
+                for _ in jobs:
+                    db_queue.task_done()
+
+    # ------------------------------------------------------------------
+    # Speculative deep research for freshly defined terms, so a click on
+    # one finds research_cache warm. Only spare Groq quota is used.
+    # ------------------------------------------------------------------
+    async def prefetch_research(terms: list[str], context: str) -> None:
+        await asyncio.sleep(RESEARCH_PREFETCH_DELAY_SECONDS)
+        context = context[:400]
+        bucket = get_groq_bucket()
+        for term in terms:
+            if research_cache.contains(term):
+                continue
+            if not bucket.try_acquire(
+                estimate_tokens(term, context), spare_requests=RESEARCH_PREFETCH_SPARE_REQUESTS
+            ):
+                return
+            try:
+                await research_cache.get_or_fetch(term, lambda: deep_research(term, context))
+            except Exception as exc:
+                logger.debug("[%s] Research prefetch failed for %s: %s", lecture_id, term, exc)
+
+    def schedule_prefetch(terms: list[str], context: str) -> None:
+        task = asyncio.create_task(prefetch_research(terms, context))
+        prefetch_tasks.add(task)
+        task.add_done_callback(prefetch_tasks.discard)
 
     # ------------------------------------------------------------------
     # Background task: drain interim queue → send to frontend
     # ------------------------------------------------------------------
     async def drain_interim():
-        while session_active:
+        # Blocks on the queue; the task is cancelled when the session ends
+        while True:
             try:
-                item = await asyncio.wait_for(stt_session.interim_queue.get(), timeout=0.5)
-                text, speaker, timestamp_seconds, is_final = item
-                if is_final:
-                    await send_json({
-                        "type": "transcript_final",
-                        "text": text,
-                        "speaker": speaker,
-                        "timestamp_seconds": timestamp_seconds,
-                    })
-                else:
-                    await send_json({
-                        "type": "transcript_interim",
-                        "text": text,
-                        "speaker": speaker,
-                    })
-            except asyncio.TimeoutError:
-                continue
+                items = [await stt_session.interim_queue.get()]
+                while len(items) < INTERIM_DRAIN_MAX:
+                    try:
+                        items.append(stt_session.interim_queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                last = len(items) - 1
+                for i, (text, speaker, timestamp_seconds, is_final) in enumerate(items):
+                    if is_final:
+                        await send_json({
+                            "type": "transcript_final",
+                            "text": text,
+                            "speaker": speaker,
+                            "timestamp_seconds": timestamp_seconds,
+                        })
+                    elif i == last:
+                        # Earlier interims in the burst are superseded by a
+                        # later hypothesis, so only the newest one is sent
+                        await send_json({
+                            "type": "transcript_interim",
+                            "text": text,
+                            "speaker": speaker,
+                        })
             except Exception as exc:
                 logger.warning("[%s] drain_interim error: %s", lecture_id, exc)
 
@@ -216,15 +317,28 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
     # ------------------------------------------------------------------
     async def process_utterances():
         utterance_buffer: list[str] = []
-        last_process_time = time.time()
-        last_pipeline_time = 0.0    # last time we actually fired Gemini
-        MIN_PIPELINE_INTERVAL = 20  # seconds between Gemini API calls
         retry_pending = False
-        retry_after = 0.0           # earliest time we can retry
+        # Pacing comes from the process-wide Groq quota rather than a fixed
+        # cooldown: runs fire as fast as the RPM/TPM budget allows.
+        bucket = get_groq_bucket()
+
+        def _take_utterance(item: tuple) -> None:
+            utterance, speaker, timestamp_seconds = item
+            if utterance.strip():
+                utterance_buffer.append(utterance)
+                logger.info("[%s] 🎤 Utterance received: %d chars from %s", 
+                           lecture_id, len(utterance), speaker)
+
+        def _take_queued_utterances() -> None:
+            while True:
+                try:
+                    _take_utterance(stt_session.utterance_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    return
 
         async def _run_pipeline(utterance: str) -> bool:
             """Run single Gemini analysis and dispatch results."""
-            nonlocal last_deep_research_time
+            nonlocal last_deep_research_time, last_summary
             
             try:
                 # 1. Single Gemini Call
@@ -250,49 +364,27 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
 
                 # 3. Process Takeaway
                 if analysis["takeaway"]:
-                    t_dict = await _save_takeaway(lecture_id, analysis["takeaway"], ts)
-                    await send_json({"type": "new_takeaway", "takeaway": t_dict})
+                    takeaway = _new_takeaway(lecture_id, analysis["takeaway"], ts)
+                    await send_json({"type": "new_takeaway", "takeaway": takeaway})
+                    queue_write(Takeaway, takeaway)
 
                 # 4. Process Summary (Live Context)
-                if analysis.get("summary"):
+                summary = analysis.get("summary")
+                # Skip unchanged summaries (ignoring whitespace): no frame, no UPDATE
+                collapsed = " ".join(summary.split()) if summary else None
+                if collapsed and collapsed != last_summary:
+                    last_summary = collapsed
                     # We broadcast the live summary of the recent context
-                    await send_json({"type": "summary_update", "summary": analysis["summary"]})
-                    # Optionally save it to DB (overwriting previous live summary)
-                    await _update_lecture_summary(lecture_id, analysis["summary"])
+                    await send_json({"type": "summary_update", "summary": summary})
+                    # Save it to DB (overwriting previous live summary)
+                    queue_write(Lecture, {"summary": summary})
 
-                # 5. Process Terms (Cards)
                 terms = analysis["terms"]
-                if terms:
-                    logger.info("[%s] 📚 Found %d terms: %s", lecture_id, len(terms), 
-                               [t["term"] for t in terms])
-                    # Filter for new terms only
-                    new_term_strs = term_cache.filter_new([t["term"] for t in terms])
-                    new_term_dicts = [t for t in terms if t["term"] in new_term_strs]
-
-                    if new_term_dicts:
-                        logger.info("[%s] 🆕 %d new terms to define", lecture_id, len(new_term_dicts))
-                        # Auto-define these new terms
-                        results = await auto_define_batch(new_term_dicts, context_tail)
-                        logger.info("[%s] ✅ Got %d definitions back", lecture_id, len(results))
-                        for res in results:
-                            term_cache.put(res["term"], res)
-                            card_dict = await _save_card(
-                                lecture_id=lecture_id,
-                                card_type="auto_define",
-                                term=res["term"],
-                                content=res["content"],
-                                citations=res.get("citations", []),
-                                badge_type=res.get("badge_type", "concept"),
-                                timestamp_seconds=ts,
-                            )
-                            logger.info("[%s] 📤 Sending card: %s", lecture_id, res["term"])
-                            await send_json({"type": "new_card", "card": card_dict})
-                    else:
-                        logger.debug("[%s] No new terms to define", lecture_id)
-                else:
-                    logger.debug("[%s] No terms extracted", lecture_id)
+                # Normalise each term once; the keys serve both caches below
+                term_entries = [(t, normalise_term(t["term"])) for t in terms]
 
-                # 5. Deep Research (throttled, using extracted topic/term)
+                # 5. Pick the deep research target (throttled, using extracted topic/term)
+                target = None
                 now = time.time()
                 if now - last_deep_research_time >= 30:
                     # Build list of potential candidates to research, in priority order
@@ -300,41 +392,100 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
                     
                     # Priority 1: High-emphasis topic
                     if analysis["topic"] and analysis["emphasis_level"] > 0.6:
-                        candidates.append(analysis["topic"])
+                        candidates.append((analysis["topic"], near_duplicate_key(normalise_term(analysis["topic"]))))
                     
                     # Priority 2: New technical terms (longest/most specific first)
                     if terms:
                         # sorted by length descending
-                        sorted_terms = sorted([t["term"] for t in terms], key=len, reverse=True)
-                        candidates.extend(sorted_terms)
+                        sorted_terms = sorted(term_entries, key=lambda e: len(e[1]), reverse=True)
+                        candidates.extend((t["term"], near_duplicate_key(key)) for t, key in sorted_terms)
 
                     # Find the first candidate that hasn't been researched yet
-                    target = None
-                    for c in candidates:
-                        key = c.strip().lower()
+                    # (near-duplicate keys, so variants of a topic count as done)
+                    for c, key in candidates:
                         if key not in deep_research_cache:
                             target = c
                             break
                     
                     if target:
                         last_deep_research_time = now
-                        deep_research_cache.add(target.strip().lower())
-                        
-                        # Fire and forget (or await if we want to block pipeline)
-                        res = await deep_research(target, context_tail)
-                        if res:
-                            dr_card = await _save_card(
-                                lecture_id=lecture_id,
-                                card_type="deep_research",
-                                term=res["term"],
-                                content=res["content"],
-                                citations=res.get("citations", []),
-                                sources=res.get("sources", []),
-                                badge_type="Research",
-                                timestamp_seconds=ts,
-                            )
-                            logger.info("[%s] 📤 Sending deep_research_result for: %s", lecture_id, res["term"])
-                            await send_json({"type": "deep_research_result", "card": dr_card})
+                        deep_research_cache.add(key)
+
+                # 6. Process Terms (Cards)
+                async def define_new_terms() -> None:
+                    if not terms:
+                        logger.debug("[%s] No terms extracted", lecture_id)
+                        return
+                    logger.info("[%s] 📚 Found %d terms: %s", lecture_id, len(terms), 
+                               [t["term"] for t in terms])
+                    # Filter for new terms only
+                    new_term_dicts = term_cache.filter_new_pairs(term_entries)
+                    if not new_term_dicts:
+                        logger.debug("[%s] No new terms to define", lecture_id)
+                        return
+
+                    logger.info("[%s] 🆕 %d new terms to define", lecture_id, len(new_term_dicts))
+                    # Auto-define these new terms (one request for the batch),
+                    # with the context already cut to what the prompt uses
+                    define_context = context_tail[-200:]
+                    await bucket.acquire(
+                        estimate_tokens(define_context, *(t["term"] for t in new_term_dicts))
+                    )
+                    # Each card goes out as soon as its chunk is defined
+                    defined_terms = []
+                    async for res in auto_define_batch(new_term_dicts, define_context):
+                        defined_terms.append(res["term"])
+                        term_cache.put(res["term"], res)
+                        card = _new_card(
+                            lecture_id=lecture_id,
+                            card_type="auto_define",
+                            term=res["term"],
+                            content=res["content"],
+                            citations=res.get("citations", []),
+                            badge_type=res.get("badge_type", "concept"),
+                            timestamp_seconds=ts,
+                        )
+                        logger.info("[%s] 📤 Sending card: %s", lecture_id, card["term"])
+                        await send_json({"type": "new_card", "card": card})
+                        queue_write(Card, card)
+                    logger.info("[%s] ✅ Got %d definitions back", lecture_id, len(defined_terms))
+
+                    # Most specific new terms first, skipping this run's target
+                    likely = sorted(
+                        (term for term in defined_terms if term != target), key=len, reverse=True
+                    )[:RESEARCH_PREFETCH_MAX]
+                    if likely:
+                        schedule_prefetch(likely, context_tail)
+
+                # 7. Deep Research on the chosen target
+                async def research_target() -> None:
+                    if not target:
+                        return
+                    res = await research_cache.get_or_fetch(
+                        target, lambda: _deep_research_limited(target, context_tail)
+                    )
+                    if res:
+                        dr_card = _new_card(
+                            lecture_id=lecture_id,
+                            card_type="deep_research",
+                            term=res["term"],
+                            content=res["content"],
+                            citations=res.get("citations", []),
+                            sources=res.get("sources", []),
+                            badge_type="Research",
+                            timestamp_seconds=ts,
+                        )
+                        logger.info("[%s] 📤 Sending deep_research_result for: %s", lecture_id, res["term"])
+                        await send_json({"type": "deep_research_result", "card": dr_card})
+                        queue_write(Card, dr_card)
+
+                # Definitions and deep research are independent LLM calls:
+                # overlap them, and don't let one failing cancel the other
+                for outcome in await asyncio.gather(
+                    define_new_terms(), research_target(), return_exceptions=True
+                ):
+                    if isinstance(outcome, Exception):
+                        logger.error("[%s] ❌ Pipeline step error: %s", lecture_id, outcome, exc_info=outcome)
 
                 return True
 
@@ -342,64 +493,38 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
                 logger.error("[%s] ❌ Pipeline error: %s", lecture_id, str(exc), exc_info=True)
                 return False
 
-        while session_active:
+        while True:
             try:
-                utterance, speaker, timestamp_seconds = await asyncio.wait_for(
-                    stt_session.utterance_queue.get(), timeout=1.0
-                )
-                if utterance.strip():
-                    utterance_buffer.append(utterance)
-                    logger.info("[%s] 🎤 Utterance received: %d chars from %s", 
-                               lecture_id, len(utterance), speaker)
+                # Block for speech unless a failed run is waiting to be retried
+                if not utterance_buffer and not retry_pending:
+                    _take_utterance(await stt_session.utterance_queue.get())
+                _take_queued_utterances()
+                if not utterance_buffer and not retry_pending:
+                    continue
 
-            except asyncio.TimeoutError:
-                pass
+                # Wait for quota, then pick up whatever arrived meanwhile
+                pending = utterance_buffer or [stt_session.get_context_tail(300)]
+                await bucket.acquire(estimate_tokens(*pending))
+                _take_queued_utterances()
             except Exception as exc:
                 logger.warning("[%s] utterance queue error: %s", lecture_id, exc)
                 continue
 
-            now = time.time()
-            time_since_last = now - last_process_time
-            time_since_pipeline = now - last_pipeline_time
-
-            # Normal trigger: new content + 15s cooldown
-            should_process = (
-                len(utterance_buffer) > 0 and
-                time_since_last >= MIN_PIPELINE_INTERVAL and
-                time_since_pipeline >= MIN_PIPELINE_INTERVAL
-            )
-
-            # Retry trigger: previous attempt failed + 20s have passed
-            should_retry = retry_pending and now >= retry_after
-
-            if should_process or should_retry:
-                logger.info("[%s] 🎯 Pipeline trigger: buffer=%d, should_process=%s, should_retry=%s",
-                           lecture_id, len(utterance_buffer), should_process, should_retry)
-                # Always combine buffered utterances with the latest context
-                combined = " ".join(utterance_buffer) if utterance_buffer else stt_session.get_context_tail(300)
-                utterance_buffer.clear()
-                last_process_time = now
-                last_pipeline_time = now
-
-                success = await _run_pipeline(combined)
-                if not success:
-                    retry_pending = True
-                    retry_after = now + 20  # retry in 20 seconds
-                    logger.info("[%s] Gemini failed — will retry in 20s", lecture_id)
-                else:
-                    retry_pending = False
+            logger.info("[%s] 🎯 Pipeline trigger: buffer=%d, retry=%s",
+                       lecture_id, len(utterance_buffer), retry_pending)
+            # Always combine buffered utterances with the latest context
+            combined = " ".join(utterance_buffer) if utterance_buffer else stt_session.get_context_tail(300)
+            utterance_buffer.clear()
+
+            success = await _run_pipeline(combined)
+            if not success:
+                retry_pending = True
+                # Also slows every other session until calls succeed again
+                bucket.backoff()
+                logger.info("[%s] LLM call failed — will retry after backoff", lecture_id)
             else:
-                if len(utterance_buffer) > 0:
-                    logger.debug("[%s] ⏳ Waiting: buffer=%d, time_since_last=%.1fs (need %d), time_since_pipeline=%.1fs (need %d)",
-                               lecture_id, len(utterance_buffer), time_since_last, MIN_PIPELINE_INTERVAL,
-                               time_since_pipeline, MIN_PIPELINE_INTERVAL)
-
-
-
-
-
-
-
+                retry_pending = False
+                bucket.reset_backoff()
 
     # ------------------------------------------------------------------
     # Background task: handle user-triggered deep research
@@ -407,9 +532,11 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
     async def handle_deep_research(selected_text: str, context: str):
         await send_json({"type": "deep_research_start", "selected_text": selected_text})
         try:
-            result = await deep_research(selected_text, context)
+            result = await research_cache.get_or_fetch(
+                selected_text, lambda: _deep_research_limited(selected_text, context)
+            )
             if result:
-                card_dict = await _save_card(
+                card = _new_card(
                     lecture_id=lecture_id,
                     card_type="deep_research",
                     term=result["term"],
@@ -420,19 +547,52 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
                     timestamp_seconds=stt_session.elapsed_seconds(),
                 )
                 logger.info("[%s] 📤 Sending user deep_research_result for: %s", lecture_id, result["term"])
-                await send_json({"type": "deep_research_result", "card": card_dict})
+                await send_json({"type": "deep_research_result", "card": card})
+                queue_write(Card, card)
         except Exception as exc:
             logger.error("[%s] ❌ Deep research error: %s", lecture_id, str(exc), exc_info=True)
 
+    # One worker serves the session's requests in order, so rapid
+    # highlighting queues up instead of fanning out concurrent calls.
+    dr_queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue(maxsize=DR_QUEUE_MAX)
+
+    async def dr_worker():
+        while True:
+            selected_text, context = await dr_queue.get()
+            await handle_deep_research(selected_text, context)
+
     # ------------------------------------------------------------------
-    # Background task: periodic transcript save (every 3s)
+    # Background task: periodic transcript save (every 3s). The transcript
+    # only ever grows, so each tick appends just the new text as a chunk,
+    # joined from the new utterances without building the whole transcript.
     # ------------------------------------------------------------------
+    def take_unsaved_transcript() -> str:
+        """Transcript text added since the last saved chunk, now counted as saved."""
+        nonlocal transcript_saved_count
+        transcript_saved_count, text = stt_session.transcript_since(transcript_saved_count)
+        return text
+
     async def periodic_transcript_save():
+        seq: Optional[int] = None
+        continued = False
         while session_active:
             try:
                 await asyncio.sleep(3)
-                if stt_session.full_transcript:
-                    await _save_transcript_chunk(lecture_id, stt_session.full_transcript)
+                if seq is None:
+                    seq = await _next_transcript_seq(lecture_id)
+                    # A reconnect continues an earlier connection's text
+                    continued = seq > 0
+                text = take_unsaved_transcript()
+                if text:
+                    if continued:
+                        text = f" {text}"
+                        continued = False
+                    queue_write(TranscriptChunk, {
+                        "lecture_id": lecture_id,
+                        "seq": seq,
+                        "text": text,
+                    })
+                    seq += 1
             except asyncio.CancelledError:
                 break
             except Exception as exc:
@@ -441,9 +601,12 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
     # ------------------------------------------------------------------
     # Start background tasks
     # ------------------------------------------------------------------
+    writer_task = asyncio.create_task(ws_writer())
+    db_writer_task = asyncio.create_task(db_writer())
     interim_task = asyncio.create_task(drain_interim())
     utterance_task = asyncio.create_task(process_utterances())
     transcript_save_task = asyncio.create_task(periodic_transcript_save())
+    dr_worker_task = asyncio.create_task(dr_worker())
 
     try:
         while True:
@@ -456,16 +619,18 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
                 # Other receive errors
                 break
 
-            # Binary audio frame
-            if "bytes" in message and message["bytes"]:
-                stt_session.send_audio(message["bytes"])
+            # Binary audio frame: the hot path, forwarded as-is
+            audio = message.get("bytes")
+            if audio:
+                stt_session.send_audio(audio)
                 continue
 
             # JSON control message
-            if "text" in message and message["text"]:
+            text = message.get("text")
+            if text:
                 try:
-                    data = json.loads(message["text"])
-                except json.JSONDecodeError:
+                    data = orjson.loads(text)
+                except orjson.JSONDecodeError:
                     continue
 
                 msg_type = data.get("type")
@@ -480,14 +645,39 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
                     selected_text = data.get("selected_text", "")
                     context = data.get("context", "")
                     if selected_text:
-                        asyncio.create_task(handle_deep_research(selected_text, context))
+                        try:
+                            dr_queue.put_nowait((selected_text, context))
+                        except asyncio.QueueFull:
+                            await send_json({"type": "deep_research_busy", "selected_text": selected_text})
 
                 elif msg_type == "end_session":
-                    # Finalize the lecture
+                    # Finalize the lecture. Stop the pipeline and let queued
+                    # writes land first so a late live summary can't
+                    # overwrite the final one.
+                    utterance_task.cancel()
                     duration = stt_session.elapsed_seconds()
-                    final_summary = await generate_summary(stt_session.full_transcript)
-                    # Pass full transcript to finalize
-                    await _finalize_lecture(lecture_id, duration, final_summary, stt_session.full_transcript)
+                    # Stream the summary to the client as it is generated,
+                    # a few words per frame rather than one per token
+                    final_summary = ""
+                    try:
+                        async for delta in coalesce_stream(stream_summary(stt_session.full_transcript)):
+                            await send_json({"type": "summary_delta", "text": delta, "reset": not final_summary})
+                            final_summary += delta
+                    except Exception as exc:
+                        logger.warning("[%s] Summary generation failed: %s", lecture_id, exc)
+                        if final_summary:
+                            # The client is showing the partial text; put back
+                            # the summary the lecture keeps (the last live one)
+                            if last_summary:
+                                await send_json({"type": "summary_update", "summary": last_summary})
+                            else:
+                                await send_json({"type": "summary_delta", "text": "", "reset": True})
+                        final_summary = ""
+                    final_summary = final_summary.strip() or None
+                    # No chunk may land after finalize has folded them in
+                    transcript_save_task.cancel()
+                    await db_queue.join()
+                    await _finalize_lecture(lecture_id, duration, final_summary, take_unsaved_transcript())
                     if final_summary:
                         await send_json({"type": "summary_update", "summary": final_summary})
                     break
@@ -501,14 +691,37 @@ async def websocket_endpoint(websocket: WebSocket, lecture_id: str):
         interim_task.cancel()
         utterance_task.cancel()
         transcript_save_task.cancel()
-        
+        dr_worker_task.cancel()
+        for task in prefetch_tasks:
+            task.cancel()
+
+        # Flush frames still queued (e.g. the final summary) before closing
+        try:
+            await asyncio.wait_for(out_queue.join(), timeout=2)
+        except asyncio.TimeoutError:
+            pass
+        writer_task.cancel()
+
+        # Persist rows still queued for the DB writer
+        try:
+            await asyncio.wait_for(db_queue.join(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("[%s] Dropped %d unsaved DB writes", lecture_id, db_queue.qsize())
+        db_writer_task.cancel()
+
         # Ensure transcript is saved even on disconnect
         try:
             duration = stt_session.elapsed_seconds()
-            await _finalize_lecture(lecture_id, duration, None, stt_session.full_transcript)
+            await _finalize_lecture(lecture_id, duration, None, take_unsaved_transcript())
         except Exception as exc:
             logger.error("[%s] Failed to save transcript on exit: %s", lecture_id, exc)
 
+        # Send transcript items still queued for Convex and stop their flusher
+        try:
+            await asyncio.wait_for(get_convex_service().close_lecture(lecture_id), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("[%s] Convex transcript flush timed out", lecture_id)
+
         close_session(lecture_id)
         drop_session_cache(lecture_id)
         logger.info("[%s] Session cleaned up", lecture_id)
@@ -1,66 +1,303 @@
 """
-services/cache.py — per-session LRU cache for already-seen terms
+services/cache.py — per-session bounded cache for already-seen terms, and a
+process-wide cache of LLM responses
 """
 from __future__ import annotations
 
+import asyncio
+import functools
+import logging
 import re
-from collections import OrderedDict
-from typing import Optional
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_WS_RE = re.compile(r"\s+")
+_NON_WORD_RE = re.compile(r"[\W_]+")
+# Term words break on punctuation, but + # * are part of names like "c++",
+# "c#" and "a*", so they are kept
+_TERM_SPLIT_RE = re.compile(r"[^\w+#*]+|_+")
+_ARTICLES = frozenset({"a", "an", "the"})
+# A key reduced to one token this short ("c", "new") is too ambiguous to fold
+_MIN_FOLDED_LEN = 4
+
+
+def normalise_term(term: str) -> str:
+    """Cache key for a term: lower-cased, trimmed, inner whitespace collapsed."""
+    return _WS_RE.sub(" ", term.strip().lower())
+
+
+def near_duplicate_key(key: str) -> str:
+    """Looser key that folds trivial variants of a normalised term together.
+
+    Punctuation becomes word breaks, articles are dropped and a plural "s" is
+    trimmed, so "gradient-descent", "the gradient descent" and "gradient
+    descents" all map to "gradient descent". A fold that would leave a
+    single token shorter than _MIN_FOLDED_LEN is skipped, so "news" stays
+    apart from "new" and "the c" from "c"; "c++", "c#" and "c" stay distinct.
+    """
+    words = [word for word in _TERM_SPLIT_RE.split(key) if word]
+    content = [word for word in words if word not in _ARTICLES]
+    if content and not _too_short(content):
+        words = content
+    folded = []
+    for word in words:
+        if len(word) > 3 and word.isalpha() and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        folded.append(word)
+    if not _too_short(folded):
+        words = folded
+    return " ".join(words) or key
+
+
+def _too_short(words: list[str]) -> bool:
+    return len(words) == 1 and len(words[0]) < _MIN_FOLDED_LEN
 
 
 class TermCache:
-    """Thread-safe LRU cache keyed by normalised term string."""
+    """Bounded cache keyed by normalised term string.
+
+    Only used from the session's event loop, so there is no locking. A plain
+    dict keeps insertion order: put() re-inserts its key at the end and the
+    oldest entry is evicted first. Lookups also match near-duplicates (see
+    near_duplicate_key) so trivial variants of a term aren't defined twice.
+    """
 
     def __init__(self, maxsize: int = 512) -> None:
-        self._cache: OrderedDict[str, dict] = OrderedDict()
+        self._cache: dict[str, dict] = {}
+        self._near: dict[str, str] = {}  # near-duplicate key -> cache key
+        self._inflight: dict[str, asyncio.Future] = {}  # near key -> pending fetch
         self._maxsize = maxsize
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
 
-    @staticmethod
-    def _normalise(term: str) -> str:
-        return re.sub(r"\s+", " ", term.strip().lower())
+    _normalise = staticmethod(normalise_term)
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
+    def _lookup_key(self, key: str) -> Optional[str]:
+        """Cache key holding `key` or a near-duplicate of it, if any."""
+        if key in self._cache:
+            return key
+        return self._near.get(near_duplicate_key(key))
+
     def contains(self, term: str) -> bool:
-        return self._normalise(term) in self._cache
+        return self._lookup_key(self._normalise(term)) is not None
 
     def get(self, term: str) -> Optional[dict]:
-        key = self._normalise(term)
-        if key in self._cache:
-            self._cache.move_to_end(key)
-            return self._cache[key]
-        return None
+        key = self._lookup_key(self._normalise(term))
+        return self._cache[key] if key is not None else None
 
     def put(self, term: str, value: dict) -> None:
         key = self._normalise(term)
+        self._cache.pop(key, None)
         self._cache[key] = value
-        self._cache.move_to_end(key)
+        self._near[near_duplicate_key(key)] = key
         if len(self._cache) > self._maxsize:
-            self._cache.popitem(last=False)
+            oldest = next(iter(self._cache))
+            del self._cache[oldest]
+            near = near_duplicate_key(oldest)
+            if self._near.get(near) == oldest:
+                del self._near[near]
 
     def filter_new(self, terms: list[str]) -> list[str]:
         """Return only terms not yet in the cache."""
-        return [t for t in terms if not self.contains(t)]
+        lookup, normalise = self._lookup_key, self._normalise
+        return [t for t in terms if lookup(normalise(t)) is None]
+
+    def filter_new_pairs(self, pairs: list[tuple[T, str]]) -> list[T]:
+        """Like filter_new, for (item, normalise_term(...)) pairs keyed up front.
+
+        Repeats within `pairs` are dropped too, so one batch never asks for
+        the same term twice.
+        """
+        lookup = self._lookup_key
+        seen: set[str] = set()
+        new = []
+        for item, key in pairs:
+            near = near_duplicate_key(key)
+            if near in seen or lookup(key) is not None:
+                continue
+            seen.add(near)
+            new.append(item)
+        return new
+
+    async def get_or_fetch(
+        self, term: str, fetch: Callable[[], Awaitable[Optional[dict]]]
+    ) -> Optional[dict]:
+        """Cached value for `term`, otherwise `await fetch()` and cache a non-empty result.
+
+        Concurrent callers for the same term share one fetch instead of each
+        issuing their own request.
+        """
+        key = self._normalise(term)
+        hit = self._lookup_key(key)
+        if hit is not None:
+            return self._cache[hit]
+
+        near = near_duplicate_key(key)
+        pending = self._inflight.get(near)
+        if pending is not None:
+            # shield: a cancelled waiter must not cancel the shared fetch
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[near] = future
+        value = None
+        try:
+            value = await fetch()
+            if value:
+                self.put(term, value)
+            return value
+        finally:
+            del self._inflight[near]
+            # Waiters get None if the fetch raised or was cancelled
+            future.set_result(value)
 
 
 # ---------------------------------------------------------------------------
 # Session-level registry — one TermCache per lecture_id
 # ---------------------------------------------------------------------------
 
-_session_caches: dict[str, TermCache] = {}
+SESSION_CACHE_MAX = 1024
+SESSION_CACHE_TTL_SECONDS = 6 * 3600
+
+# lecture_id -> (cache, last access), kept in last-access order so stale
+# entries are always at the front. Bounded so a session whose cleanup never
+# ran can't leak its cache forever.
+_session_caches: dict[str, tuple[TermCache, float]] = {}
+
+
+def _evict_stale_sessions(now: float) -> None:
+    while _session_caches:
+        lecture_id, (_, last_access) = next(iter(_session_caches.items()))
+        if now - last_access <= SESSION_CACHE_TTL_SECONDS and len(_session_caches) <= SESSION_CACHE_MAX:
+            break
+        del _session_caches[lecture_id]
+        logger.warning("Evicted session term cache for %s that was never dropped", lecture_id)
 
 
 def get_session_cache(lecture_id: str) -> TermCache:
-    if lecture_id not in _session_caches:
-        _session_caches[lecture_id] = TermCache()
-    return _session_caches[lecture_id]
+    now = time.monotonic()
+    entry = _session_caches.pop(lecture_id, None)
+    cache = entry[0] if entry else TermCache()
+    _session_caches[lecture_id] = (cache, now)
+    _evict_stale_sessions(now)
+    return cache
 
 
 def drop_session_cache(lecture_id: str) -> None:
     _session_caches.pop(lecture_id, None)
+
+
+# ---------------------------------------------------------------------------
+# Process-wide LLM response cache, shared by all sessions
+# ---------------------------------------------------------------------------
+
+RESPONSE_CACHE_MAX = 2048
+RESPONSE_CACHE_TTL_SECONDS = 3600
+RESPONSE_CONTEXTS_PER_TERM = 4
+# Minimum word overlap (Jaccard) between contexts for a cached answer to count
+CONTEXT_SIMILARITY_MIN = 0.5
+
+
+def _context_words(context: str) -> frozenset[str]:
+    return frozenset(w for w in _NON_WORD_RE.split(context.lower()) if len(w) > 3)
+
+
+def _similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    return len(a & b) / len(a | b)
+
+
+class ResponseCache:
+    """TTL cache of LLM results keyed by term, told apart by context.
+
+    A lookup hits when a cached entry for the same term was
+    produced from the exact same context (checked first, with no word
+    splitting) or from a similar enough one (word overlap, see
+    CONTEXT_SIMILARITY_MIN). A rolling transcript window that has barely
+    moved reuses the answer; another lecture using the word in a different
+    sense does not. Terms are evicted oldest first.
+    """
+
+    def __init__(
+        self, maxsize: int = RESPONSE_CACHE_MAX, ttl: float = RESPONSE_CACHE_TTL_SECONDS
+    ) -> None:
+        # key -> [(context, context words, value, expires at)], newest last
+        self._entries: dict[str, list[tuple[str, frozenset[str], dict, float]]] = {}
+        self._maxsize = maxsize
+        self._ttl = ttl
+
+    def get(self, key: str, context: str) -> Optional[dict]:
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+        now = time.monotonic()
+        entries[:] = [e for e in entries if e[3] > now]
+        for cached_context, _, value, _ in entries:
+            if cached_context == context:
+                return value
+        words = _context_words(context)
+        for _, cached_words, value, _ in reversed(entries):
+            if _similarity(words, cached_words) >= CONTEXT_SIMILARITY_MIN:
+                return value
+        return None
+
+    def put(self, key: str, context: str, value: dict) -> None:
+        entries = self._entries.pop(key, [])
+        entries = [e for e in entries if e[0] != context]
+        entries.append((context, _context_words(context), value, time.monotonic() + self._ttl))
+        self._entries[key] = entries[-RESPONSE_CONTEXTS_PER_TERM:]
+        if len(self._entries) > self._maxsize:
+            del self._entries[next(iter(self._entries))]
+
+
+_response_cache = ResponseCache()
+
+
+def _response_key(kind: str, term: str) -> str:
+    # Exact normalised term, not near_duplicate_key: a shared answer is shown
+    # as-is, so only the same term may reuse it
+    return f"{kind}:{normalise_term(term)}"
+
+
+def get_cached_response(kind: str, term: str, context: str) -> Optional[dict]:
+    """Copy of a cached `kind` result for `term` in a similar context, or None."""
+    hit = _response_cache.get(_response_key(kind, term), context)
+    return dict(hit) if hit is not None else None
+
+
+def put_cached_response(kind: str, term: str, context: str, value: dict) -> None:
+    _response_cache.put(_response_key(kind, term), context, dict(value))
+
+
+def cached_response(kind: str):
+    """Decorate an `async fn(term, context) -> Optional[dict]` LLM call with
+    the shared ResponseCache. Hits are returned as copies; empty results are
+    not cached.
+    """
+
+    def decorator(fetch: Callable[[str, str], Awaitable[Optional[dict]]]):
+        @functools.wraps(fetch)
+        async def wrapper(term: str, context: str) -> Optional[dict]:
+            hit = get_cached_response(kind, term, context)
+            if hit is not None:
+                logger.debug("Response cache hit for %s in %s: %s", kind, fetch.__module__, term)
+                return hit
+            value = await fetch(term, context)
+            if value:
+                put_cached_response(kind, term, context, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -5,9 +5,10 @@ Provides optional real-time sync of lecture data through Convex.
 Falls back gracefully if Convex is disabled via config.
 """
 
+import asyncio
 import logging
 from typing import Optional, Any, Dict
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 try:
     from convex import ConvexClient
@@ -20,6 +21,13 @@ from config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Max Convex calls in flight at once; each one occupies a worker thread
+CONVEX_MAX_CONCURRENCY = 16
+# Transcript items are sent in batches of up to this many, or whatever
+# arrived within the window after the first one
+TRANSCRIPT_BATCH_MAX = 64
+TRANSCRIPT_BATCH_WINDOW_SECONDS = 0.2
+
 
 @dataclass
 class ConvexTranscriptData:
@@ -57,6 +65,13 @@ class ConvexService:
         settings = get_settings()
         self.enabled = settings.enable_convex and CONVEX_AVAILABLE
         self.client = None
+        self._semaphore = asyncio.Semaphore(CONVEX_MAX_CONCURRENCY)
+        # Per-lecture transcript queues, each drained by its own flusher task
+        self._transcript_queues: Dict[str, asyncio.Queue] = {}
+        self._transcript_flushers: Dict[str, asyncio.Task] = {}
+        # Cleared once the deployment turns out not to have
+        # "transcript:add_batch"; items then go one "transcript:add" each
+        self._transcript_batch_supported = True
         
         if self.enabled:
             try:
@@ -72,34 +87,92 @@ class ConvexService:
         else:
             logger.info('[Convex] Disabled via configuration or package not installed')
     
+    async def _mutation(self, name: str, args: Dict[str, Any]) -> Any:
+        """Run a blocking ConvexClient.mutation in a worker thread."""
+        async with self._semaphore:
+            return await asyncio.to_thread(self.client.mutation, name, args)
+    
+    async def _query(self, name: str, args: Dict[str, Any]) -> Any:
+        """Run a blocking ConvexClient.query in a worker thread."""
+        async with self._semaphore:
+            return await asyncio.to_thread(self.client.query, name, args)
+    
     async def sync_transcript(self, data: ConvexTranscriptData) -> bool:
         """
-        Sync transcript update to Convex.
+        Queue a transcript update for batched sync to Convex.
+        
+        Items are grouped per lecture and sent with one
+        "transcript:add_batch" mutation by a background flusher, or one
+        "transcript:add" each where the deployment lacks the batch mutation.
         
         Args:
             data: Transcript data to sync
             
         Returns:
-            True if successful, False if Convex disabled or error
+            True if queued, False if Convex disabled
         """
         if not self.enabled or not self.client:
             return False
         
-        try:
-            result = self.client.mutation(
-                "transcript:add",
-                {
-                    "lecture_id": data.lecture_id,
-                    "text": data.text,
-                    "timestamp": data.timestamp,
-                    "speaker": data.speaker
-                }
+        queue = self._transcript_queues.get(data.lecture_id)
+        if queue is None:
+            queue = self._transcript_queues[data.lecture_id] = asyncio.Queue()
+            self._transcript_flushers[data.lecture_id] = asyncio.create_task(
+                self._transcript_flusher(data.lecture_id, queue)
             )
-            logger.debug(f'[Convex] Transcript synced: {data.lecture_id}')
-            return True
-        except Exception as e:
-            logger.error(f'[Convex] Transcript sync error: {e}')
-            return False
+        queue.put_nowait(data)
+        return True
+    
+    async def _transcript_flusher(self, lecture_id: str, queue: asyncio.Queue) -> None:
+        """Send queued transcript items for one lecture in batches."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + TRANSCRIPT_BATCH_WINDOW_SECONDS
+            while len(batch) < TRANSCRIPT_BATCH_MAX:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._send_transcript_batch(batch)
+                logger.debug(f'[Convex] {len(batch)} transcript items synced: {lecture_id}')
+            except Exception as e:
+                logger.error(f'[Convex] Transcript batch sync error ({len(batch)} items): {e}')
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _send_transcript_batch(self, batch: list) -> None:
+        if self._transcript_batch_supported:
+            try:
+                await self._mutation(
+                    "transcript:add_batch",
+                    {"items": [asdict(item) for item in batch]}
+                )
+                return
+            except Exception as e:
+                logger.warning(
+                    f'[Convex] transcript:add_batch failed ({e}); '
+                    f'falling back to transcript:add per item'
+                )
+                self._transcript_batch_supported = False
+        for item in batch:
+            await self._mutation("transcript:add", asdict(item))
+    
+    async def close_lecture(self, lecture_id: str) -> None:
+        """Flush a lecture's queued transcript items and stop its flusher."""
+        queue = self._transcript_queues.pop(lecture_id, None)
+        flusher = self._transcript_flushers.pop(lecture_id, None)
+        if queue is None:
+            return
+        try:
+            await queue.join()
+        finally:
+            flusher.cancel()
     
     async def sync_takeaway(self, data: ConvexTakeaway) -> bool:
         """
@@ -115,7 +188,7 @@ class ConvexService:
             return False
         
         try:
-            result = self.client.mutation(
+            result = await self._mutation(
                 "takeaway:add",
                 {
                     "lecture_id": data.lecture_id,
@@ -144,7 +217,7 @@ class ConvexService:
             return False
         
         try:
-            result = self.client.mutation(
+            result = await self._mutation(
                 "definition:add",
                 {
                     "lecture_id": data.lecture_id,
@@ -174,7 +247,7 @@ class ConvexService:
             return None
         
         try:
-            result = self.client.query(
+            result = await self._query(
                 "transcript:get_by_lecture",
                 {"lecture_id": lecture_id}
             )
@@ -198,7 +271,7 @@ class ConvexService:
             return None
         
         try:
-            result = self.client.query(
+            result = await self._query(
                 "takeaway:get_by_lecture",
                 {"lecture_id": lecture_id}
             )
@@ -222,7 +295,7 @@ class ConvexService:
             return None
         
         try:
-            result = self.client.query(
+            result = await self._query(
                 "definition:get_by_lecture",
                 {"lecture_id": lecture_id}
             )
@@ -4,99 +4,179 @@ Uses OpenAI SDK with Groq API base URL.
 """
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
-import re
-from typing import Optional
+import string
+from typing import AsyncIterator, Optional
 
-from openai import AsyncOpenAI
+from openai import BadRequestError
+from pydantic import ValidationError
 
 from config import get_settings
+from models.events import AnalyzeResult
+from services.llm_clients import get_groq_client
+from services.ratelimit import note_rate_limit
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-_MODEL = "llama-3.1-8b-instant"
-_client: AsyncOpenAI | None = None
+_MODEL = settings.groq_model
 
+# Only the end of the transcript is analyzed
+_ANALYZE_TAIL_CHARS = 800
+
+# Recent analyze_utterance results by tail fingerprint, oldest first, so a
+# tail that hasn't meaningfully changed (and the topic/takeaway helpers)
+# reuse them instead of calling the model again
+_ANALYSIS_CACHE_MAX = 32
+_FINGERPRINT_WORDS = 30
+_recent_analyses: dict[str, dict] = {}
 
-def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(
-            api_key=get_settings().groq_api_key,
-            base_url="https://api.groq.com/openai/v1",
-        )
-    return _client
+
+def _fingerprint(tail: str) -> str:
+    """The tail's last words, lowercased and without punctuation, so case,
+    spacing and punctuation fixes from the STT don't count as new content."""
+    words = (w.strip(string.punctuation) for w in tail.lower().split()[-_FINGERPRINT_WORDS:])
+    return " ".join(w for w in words if w)
 
 
 # ---------------------------------------------------------------------------
 # Term extraction
 # ---------------------------------------------------------------------------
 
-_ANALYZE_PROMPT = """You are a lecture assistant analyzing the live transcript of a lecture.
-The following is the FULL TRANSCRIPT so far.
+_ANALYZE_PROMPT = """Analyze the end of this live lecture transcript. Return JSON only:
+{{"terms": [{{"term": "...", "type": "concept|person|event"}}], "topic": "...", "emphasis_level": 0.0-1.0, "takeaway": "..." or null, "summary": "..."}}
+terms: 2-3 technical terms from the last few sentences that need defining. topic: the current topic. \
+takeaway: only if a key point was just made. summary: 2-3 sentences on the recent segment.
+
+Transcript:
+{utterance}"""
 
-Your task:
-1. Identify the **current topic** being discussed at the very end of the transcript.
-2. Extract 2-3 **current** key technical terms/concepts from the recent context (last few sentences) that need defining.
-3. Determine the emphasis level of the current topic.
-4. Extract a takeaway if the speaker just finished a key point.
-5. Provide a **concise summary** of this specific segment (last ~15 sentences).
+# The input goes last, so prompts are built by plain concatenation
+_ANALYZE_PREFIX = _ANALYZE_PROMPT.format(utterance="")
 
-Return ONLY this JSON:
-{{"terms": [{{"term": "...", "type": "concept"}}], "topic": "...", "emphasis_level": 0.7, "takeaway": "..." or null, "summary": "..."}}
 
-Full Transcript:
-{utterance}"""
 
+def _close_truncated_json(raw: str) -> str:
+    """Best-effort repair of a JSON object cut off mid-generation.
 
+    Keeps everything up to the last complete value and closes the open
+    arrays and objects, so a reply truncated by max_tokens still yields the
+    fields it finished.
+    """
+    start = raw.find("{")
+    if start == -1:
+        return raw
+    text = raw[start:]
+    stack: list[str] = []  # closers of the open containers
+    expect_key = in_string = is_key = escaped = in_scalar = False
+    cut, cut_closers = 0, ""  # last point where the text can be closed
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                if not is_key:
+                    cut, cut_closers = i + 1, "".join(reversed(stack))
+            continue
+        if in_scalar and ch in ",]} \t\r\n":
+            # number / true / false / null complete
+            in_scalar = False
+            cut, cut_closers = i, "".join(reversed(stack))
+        if ch == '"':
+            in_string = True
+            is_key = expect_key
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            expect_key = ch == "{"
+            cut, cut_closers = i + 1, "".join(reversed(stack))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            expect_key = False
+            cut, cut_closers = i + 1, "".join(reversed(stack))
+        elif ch == ",":
+            expect_key = bool(stack) and stack[-1] == "}"
+        elif ch == ":":
+            expect_key = False
+        elif ch not in " \t\r\n":
+            in_scalar = True
+    return text[:cut] + cut_closers
+
+
+def _parse_analysis(raw: str) -> AnalyzeResult:
+    """Validate the model's JSON, repairing a truncated reply instead of
+    failing (a failure costs the caller a whole retry)."""
+    try:
+        return AnalyzeResult.model_validate_json(raw)
+    except ValidationError:
+        return AnalyzeResult.model_validate_json(_close_truncated_json(raw))
 
 
 async def analyze_utterance(utterance: str) -> dict:
     """
     Single Groq call that extracts terms, topic, emphasis level, and takeaway.
     Returns dict with keys: terms, topic, emphasis_level, takeaway.
-    Returns empty defaults on failure.
+    Returns empty defaults on failure, and for an utterance whose analysis
+    was already returned (same fingerprint) so callers don't dispatch it twice.
     """
     default = {"terms": [], "topic": None, "emphasis_level": 0.5, "takeaway": None}
     if not utterance.strip():
         return default
 
-    prompt = _ANALYZE_PROMPT.format(utterance=utterance[:1500])
+    # Sliced once; it is both the prompt input and the cache key source.
+    # Slicing a string that is already short enough returns it without a copy.
+    tail = utterance[-_ANALYZE_TAIL_CHARS:]
+    fingerprint = _fingerprint(tail)
+    if fingerprint in _recent_analyses:
+        # Only a cosmetic STT correction: its takeaway, topic and terms have
+        # already gone out, so there is nothing new to dispatch
+        return default
+
+    prompt = _ANALYZE_PREFIX + tail
     try:
-        response = await _get_client().chat.completions.create(
-            model=_MODEL,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=512,
-        )
-        raw = response.choices[0].message.content.strip()
-        raw = re.sub(r"^```(?:json)?\s*", "", raw)
-        raw = re.sub(r"\s*```$", "", raw)
-        data = json.loads(raw)
-        
-        # Safely convert emphasis_level with fallback
-        emphasis = data.get("emphasis_level")
         try:
-            emphasis_level = float(emphasis) if emphasis is not None else 0.5
-        except (ValueError, TypeError):
-            emphasis_level = 0.5
-            
-        return {
+            response = await get_groq_client().chat.completions.create(
+                model=_MODEL,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=256,
+                # JSON mode: Groq constrains the reply to a bare JSON object
+                response_format={"type": "json_object"},
+            )
+            raw = response.choices[0].message.content
+        except BadRequestError as exc:
+            # JSON mode rejects output that doesn't validate (typically cut
+            # off by max_tokens) but returns it; salvage it, don't retry
+            body = exc.body if isinstance(exc.body, dict) else {}
+            if body.get("code") != "json_validate_failed" or not body.get("failed_generation"):
+                raise
+            raw = body["failed_generation"]
+        data = _parse_analysis(raw)
+
+        analysis = {
             "terms": [
-                {"term": str(t.get("term", "")), "type": str(t.get("type", "concept"))}
-                for t in data.get("terms", [])
-                if t.get("term")
+                {"term": t.term, "type": t.type or "concept"}
+                for t in data.terms
+                if t.term
             ],
-            "topic": data.get("topic") or None,
-            "emphasis_level": emphasis_level,
-            "takeaway": data.get("takeaway") or None,
-            "summary": data.get("summary") or None,
+            "topic": data.topic or None,
+            "emphasis_level": data.emphasis_level,
+            "takeaway": data.takeaway or None,
+            "summary": data.summary or None,
         }
+        _recent_analyses.pop(fingerprint, None)
+        _recent_analyses[fingerprint] = analysis
+        if len(_recent_analyses) > _ANALYSIS_CACHE_MAX:
+            del _recent_analyses[next(iter(_recent_analyses))]
+        return analysis
     except Exception as exc:
+        note_rate_limit(exc)
         logger.warning("analyze_utterance failed: %s", exc)
         raise  # re-raise so caller can detect failure for retry logic
 
@@ -110,118 +190,141 @@ _SUMMARY_PROMPT = """You are a lecture assistant. Produce a concise, 3-5 sentenc
 of the following lecture transcript so far. Focus on the main topics covered.
 Transcript:
 {transcript}"""
+_SUMMARY_PREFIX = _SUMMARY_PROMPT.format(transcript="")
+
+
+async def stream_summary(transcript: str) -> AsyncIterator[str]:
+    """Yield the rolling summary as text deltas while the model generates it."""
+    if not transcript.strip():
+        return
+    prompt = _SUMMARY_PREFIX + transcript[-4000:]
+    stream = await get_groq_client().chat.completions.create(
+        model=_MODEL,
+        messages=[
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=192,
+        stream=True,
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def coalesce_stream(
+    chunks: AsyncIterator[str], min_chars: int = 40, max_delay: float = 0.05
+) -> AsyncIterator[str]:
+    """Re-yield `chunks` joined into pieces of at least `min_chars`.
+
+    Whatever has arrived is flushed once `max_delay` seconds have passed
+    since its first chunk, so a slow stream still renders progressively.
+    An error from `chunks` is raised after the buffered text is yielded.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(chunk)
+        finally:
+            queue.put_nowait(None)
+
+    pump_task = asyncio.create_task(pump())
+    try:
+        buffer: list[str] = []
+        size = 0
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+            try:
+                chunk = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                chunk = ""  # deadline reached: flush what we have
+            if chunk is None:
+                break
+            if chunk:
+                buffer.append(chunk)
+                size += len(chunk)
+                if deadline is None:
+                    deadline = loop.time() + max_delay
+            if buffer and (size >= min_chars or loop.time() >= deadline):
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+                deadline = None
+        if buffer:
+            yield "".join(buffer)
+        await pump_task
+    finally:
+        pump_task.cancel()
 
 
 async def generate_summary(transcript: str) -> Optional[str]:
     """Generate a rolling summary from the transcript buffer."""
-    if not transcript.strip():
-        return None
-    prompt = _SUMMARY_PROMPT.format(transcript=transcript[-4000:])
     try:
-        response = await _get_client().chat.completions.create(
-            model=_MODEL,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=256,
-        )
-        return response.choices[0].message.content.strip()
+        summary = "".join([delta async for delta in stream_summary(transcript)])
+        return summary.strip() or None
     except Exception as exc:
         logger.warning("Summary generation failed: %s", exc)
     return None
 
 
 # ---------------------------------------------------------------------------
-# Takeaway detection
+# Takeaway / topic detection (deprecated: read analyze_utterance's result)
 # ---------------------------------------------------------------------------
 
-_TAKEAWAY_PROMPT = """You are a lecture assistant. Determine if the following sentence \
-contains a key takeaway or important point a student should remember.
-If yes, return a single JSON object: {{"is_takeaway": true, "text": "<concise takeaway>"}}
-If no, return: {{"is_takeaway": false}}
-Sentence: {utterance}"""
-
-
-async def detect_takeaway(utterance: str) -> Optional[str]:
-    """Return a takeaway string if the utterance contains a key point, else None."""
+async def _analysis_for(utterance: str) -> Optional[dict]:
+    """Cached analyze_utterance result, running the analysis on a miss."""
     if not utterance.strip():
         return None
-    prompt = _TAKEAWAY_PROMPT.format(utterance=utterance)
+    # analyze_utterance answers a repeat with empty defaults; these helpers
+    # want the analysis itself, so they read the cache first
+    cached = _recent_analyses.get(_fingerprint(utterance[-_ANALYZE_TAIL_CHARS:]))
+    if cached is not None:
+        return cached
     try:
-        response = await _get_client().chat.completions.create(
-            model=_MODEL,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=256,
-        )
-        raw = response.choices[0].message.content.strip()
-        raw = re.sub(r"^```(?:json)?\s*", "", raw)
-        raw = re.sub(r"\s*```$", "", raw)
-        data = json.loads(raw)
-        if isinstance(data, dict) and data.get("is_takeaway") and data.get("text"):
-            return str(data["text"])
+        return await analyze_utterance(utterance)
     except Exception as exc:
-        logger.warning("Takeaway detection failed: %s", exc)
-    return None
+        logger.warning("Utterance analysis failed: %s", exc)
+        return None
 
 
-# ---------------------------------------------------------------------------
-# Topic detection
-# ---------------------------------------------------------------------------
+async def detect_takeaway(utterance: str) -> Optional[str]:
+    """Deprecated: use analyze_utterance(...)["takeaway"].
 
-_TOPIC_PROMPT = """You are a lecture assistant. Given the following utterance, identify \
-the main topic being discussed and estimate its emphasis level (0.0 = passing mention, \
-1.0 = central focus).
-Return JSON only: {{"topic": "...", "emphasis_level": 0.0}}
-Utterance: {utterance}"""
+    Return a takeaway string if the utterance contains a key point, else None.
+    """
+    analysis = await _analysis_for(utterance)
+    return str(analysis["takeaway"]) if analysis and analysis["takeaway"] else None
 
 
 async def detect_topic(utterance: str) -> Optional[dict]:
-    """Return {topic, emphasis_level} or None."""
-    if not utterance.strip():
+    """Deprecated: use analyze_utterance(...)["topic"/"emphasis_level"].
+
+    Return {topic, emphasis_level} or None.
+    """
+    analysis = await _analysis_for(utterance)
+    if not analysis or not analysis["topic"]:
         return None
-    prompt = _TOPIC_PROMPT.format(utterance=utterance)
-    try:
-        response = await _get_client().chat.completions.create(
-            model=_MODEL,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=256,
-        )
-        raw = response.choices[0].message.content.strip()
-        raw = re.sub(r"^```(?:json)?\s*", "", raw)
-        raw = re.sub(r"\s*```$", "", raw)
-        data = json.loads(raw)
-        if isinstance(data, dict) and "topic" in data:
-            # Safely convert emphasis_level with fallback
-            emphasis = data.get("emphasis_level")
-            try:
-                emphasis_level = float(emphasis) if emphasis is not None else 0.5
-            except (ValueError, TypeError):
-                emphasis_level = 0.5
-                
-            return {
-                "topic": str(data["topic"]),
-                "emphasis_level": emphasis_level,
-            }
-    except Exception as exc:
-        logger.warning("Topic detection failed: %s", exc)
-    return None
+    return {
+        "topic": str(analysis["topic"]),
+        "emphasis_level": analysis["emphasis_level"],
+    }
 
 
 # ---------------------------------------------------------------------------
 # Deep-research synthesis
 # ---------------------------------------------------------------------------
 
-_SYNTHESIS_PROMPT = """You are a research assistant. Using the following web search results, \
-write a comprehensive, multi-paragraph explanation of "{term}" in the context of: "{context}".
+_SYNTHESIS_PROMPT = """You are a research assistant. Using the web search results below, \
+write a comprehensive, multi-paragraph explanation of the term in the context given.
 Include key facts, definitions, and relevant details. Be thorough but clear.
 
+Term: {term}
+Context: {context}
+
 Search results:
 {snippets}"""
 
@@ -230,7 +333,7 @@ async def synthesize_deep_research(term: str, context: str, snippets: str) -> st
     """Synthesize a multi-paragraph deep-research explanation using Groq."""
     prompt = _SYNTHESIS_PROMPT.format(term=term, context=context, snippets=snippets[:6000])
     try:
-        response = await _get_client().chat.completions.create(
+        response = await get_groq_client().chat.completions.create(
             model=_MODEL,
             messages=[
                 {"role": "user", "content": prompt}
@@ -3,43 +3,60 @@ services/gemini_info_service.py - Gemini-powered definitions and deep research
 """
 from __future__ import annotations
 
-import asyncio
 import logging
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-import google.genai as genai
+import orjson
+from google.genai import types
 
-from config import get_settings
+from models.events import DefinitionBatch
+from services.cache import normalise_term
+from services.llm_clients import get_gemini_client
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 _MODEL = "gemini-flash-latest"
-_client: genai.Client | None = None
 
+# Static instructions go in the system instruction and only the term and
+# context are sent as the per-call prompt, so the instruction is the
+# reusable prefix of every request.
 
-def _get_client() -> genai.Client:
-    global _client
-    if _client is None:
-        _client = genai.Client(api_key=settings.gemini_api_key)
-    return _client
+_DEFINITION_INSTRUCTION = """You are a lecture assistant. Define the term below in 1-3 clear sentences.
+Use the lecture context only to disambiguate meaning. Avoid citations."""
 
+_DEFINITION_PROMPT = """Term: {term}
+Context: {context}
+"""
+
+_DEFINITION_CONFIG = types.GenerateContentConfig(system_instruction=_DEFINITION_INSTRUCTION)
 
-_DEFINITION_PROMPT = """You are a lecture assistant. Define the term below in 1-3 clear sentences.
+
+_BATCH_DEFINITION_INSTRUCTION = """You are a lecture assistant. Define each term below in 1-3 clear sentences.
 Use the lecture context only to disambiguate meaning. Avoid citations.
+Return one definition per term, with the term spelled exactly as given."""
 
-Term: {term}
+_BATCH_DEFINITION_PROMPT = """Terms: {terms}
 Context: {context}
 """
 
+_BATCH_DEFINITION_CONFIG = types.GenerateContentConfig(
+    system_instruction=_BATCH_DEFINITION_INSTRUCTION,
+    response_mime_type="application/json",
+    response_schema=DefinitionBatch,
+)
+
+_BADGE_TYPES = frozenset({"person", "event", "concept"})
 
-_DEEP_RESEARCH_PROMPT = """You are a research assistant. Write a thorough, multi-paragraph explanation
-of the topic below for a student. Use the lecture context only to disambiguate. Avoid citations.
 
-Topic: {term}
+_DEEP_RESEARCH_INSTRUCTION = """You are a research assistant. Write a thorough, multi-paragraph explanation
+of the topic below for a student. Use the lecture context only to disambiguate. Avoid citations."""
+
+_DEEP_RESEARCH_PROMPT = """Topic: {term}
 Context: {context}
 """
 
+_DEEP_RESEARCH_CONFIG = types.GenerateContentConfig(system_instruction=_DEEP_RESEARCH_INSTRUCTION)
+
 
 async def auto_define(term: str, context_tail: str) -> Optional[dict]:
     """Return a Gemini-generated definition card or None on failure."""
@@ -48,9 +65,10 @@ async def auto_define(term: str, context_tail: str) -> Optional[dict]:
 
     prompt = _DEFINITION_PROMPT.format(term=term, context=context_tail[-200:])
     try:
-        response = await _get_client().aio.models.generate_content(
+        response = await get_gemini_client().aio.models.generate_content(
             model=_MODEL,
             contents=prompt,
+            config=_DEFINITION_CONFIG,
         )
         content = response.text.strip()
         if not content:
@@ -70,19 +88,40 @@ async def auto_define(term: str, context_tail: str) -> Optional[dict]:
 async def auto_define_batch(
     terms: list[dict],
     context_tail: str,
-) -> list[dict]:
-    """Run auto_define concurrently for all terms and return successful results."""
-
-    async def _define_one(item: dict) -> Optional[dict]:
-        result = await auto_define(item.get("term", ""), context_tail)
-        if result:
-            type_map = {"person": "person", "event": "event", "concept": "concept"}
-            result["badge_type"] = type_map.get(item.get("type", "concept"), "concept")
-        return result
+) -> AsyncIterator[dict]:
+    """Define all terms with one Gemini call and yield the successful results."""
+    items = [item for item in terms if item.get("term", "").strip()]
+    if not items:
+        return
+
+    prompt = _BATCH_DEFINITION_PROMPT.format(
+        terms=orjson.dumps([item["term"] for item in items]).decode(),
+        context=context_tail[-200:],
+    )
+    try:
+        response = await get_gemini_client().aio.models.generate_content(
+            model=_MODEL,
+            contents=prompt,
+            config=_BATCH_DEFINITION_CONFIG,
+        )
+        batch = response.parsed or DefinitionBatch.model_validate_json(response.text)
+    except Exception as exc:
+        logger.warning("Gemini batch definition failed for %d terms: %s", len(items), exc)
+        return
 
-    tasks = [_define_one(item) for item in terms]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    return [r for r in results if isinstance(r, dict)]
+    contents = {normalise_term(d.term): d.content.strip() for d in batch.definitions}
+    for item in items:
+        content = contents.get(normalise_term(item["term"]))
+        if not content:
+            continue
+        badge_type = item.get("type", "concept")
+        yield {
+            "term": item["term"],
+            "content": content,
+            "citations": [],
+            "sources": [],
+            "badge_type": badge_type if badge_type in _BADGE_TYPES else "concept",
+        }
 
 
 async def deep_research(term: str, context: str) -> Optional[dict]:
@@ -92,9 +131,10 @@ async def deep_research(term: str, context: str) -> Optional[dict]:
 
     prompt = _DEEP_RESEARCH_PROMPT.format(term=term, context=context[:400])
     try:
-        response = await _get_client().aio.models.generate_content(
+        response = await get_gemini_client().aio.models.generate_content(
             model=_MODEL,
             contents=prompt,
+            config=_DEEP_RESEARCH_CONFIG,
         )
         content = response.text.strip()
         if not content:
@@ -1,5 +1,7 @@
 import os
+import asyncio
 import logging
+import threading
 from typing import Optional, Dict, Any, List
 from google.auth.transport.requests import Request
 from google.oauth2.service_account import Credentials
@@ -14,8 +16,7 @@ class GoogleDocsService:
     """Service for creating and managing Google Docs documents."""
     
     SCOPES = [
-        'https://www.googleapis.com/auth/documents',
-        'https://www.googleapis.com/auth/drive'
+        'https://www.googleapis.com/auth/documents'
     ]
     
     def __init__(self, credentials_file: Optional[str] = None):
@@ -32,7 +33,8 @@ class GoogleDocsService:
         
         self.credentials_file = credentials_file
         self.docs_service = None
-        self.drive_service = None
+        # The API client's httplib2 connection isn't thread-safe
+        self._lock = threading.Lock()
         
         if self.credentials_file and os.path.exists(self.credentials_file):
             self._initialize_services()
@@ -40,14 +42,13 @@ class GoogleDocsService:
             logger.warning('[GoogleDocs] No credentials file found. Google Docs export will not work.')
     
     def _initialize_services(self):
-        """Initialize Google Docs and Drive services using service account credentials."""
+        """Initialize the Google Docs service using service account credentials."""
         try:
             credentials = Credentials.from_service_account_file(
                 self.credentials_file,
                 scopes=self.SCOPES
             )
             self.docs_service = build('docs', 'v1', credentials=credentials)
-            self.drive_service = build('drive', 'v3', credentials=credentials)
             logger.info('[GoogleDocs] Services initialized successfully')
         except Exception as e:
             logger.error(f'[GoogleDocs] Failed to initialize services: {e}')
@@ -73,43 +74,12 @@ class GoogleDocsService:
         Returns:
             Dict with 'doc_id', 'doc_url', and 'web_view_link'
         """
-        if not self.docs_service or not self.drive_service:
+        if not self.docs_service:
             raise RuntimeError('Google Docs service not initialized. Missing credentials.')
         
         try:
-            # Create document
-            doc_title = f"{title} - {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
-            body = {'title': doc_title}
-            doc = self.docs_service.documents().create(body=body).execute()
-            doc_id = doc['documentId']
-            logger.info(f'[GoogleDocs] Created document: {doc_id}')
-            
-            # Prepare content for insertion
-            requests = self._build_requests(doc_id, title, summary, definitions, takeaways, deep_research)
-            
-            # Apply formatting
-            if requests:
-                self.docs_service.documents().batchUpdate(
-                    documentId=doc_id,
-                    body={'requests': requests}
-                ).execute()
-                logger.info(f'[GoogleDocs] Formatted document: {doc_id}')
-            
-            # Get shareable link
-            drive_file = self.drive_service.files().get(
-                fileId=doc_id,
-                fields='webViewLink'
-            ).execute()
-            
-            web_view_link = drive_file.get('webViewLink', '')
-            logger.info(f'[GoogleDocs] Document ready: {web_view_link}')
-            
-            return {
-                'doc_id': doc_id,
-                'doc_url': web_view_link,
-                'web_view_link': web_view_link,
-                'title': doc_title
-            }
+            with self._lock:
+                return self._create_doc(title, summary, definitions, takeaways, deep_research)
         except exceptions.GoogleAPIError as e:
             logger.error(f'[GoogleDocs] API error: {e}')
             raise
@@ -117,6 +87,65 @@ class GoogleDocsService:
             logger.error(f'[GoogleDocs] Unexpected error: {e}')
             raise
     
+    async def create_lecture_summary_doc_async(
+        self,
+        title: str,
+        summary: str,
+        definitions: List[Dict[str, str]],
+        takeaways: List[str],
+        deep_research: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Async create_lecture_summary_doc for use on the event loop.
+        
+        The Google API client only blocks, so the whole create -> update flow
+        runs in one worker thread and the event loop stays free meanwhile.
+        """
+        return await asyncio.to_thread(
+            self.create_lecture_summary_doc,
+            title=title,
+            summary=summary,
+            definitions=definitions,
+            takeaways=takeaways,
+            deep_research=deep_research
+        )
+    
+    def _create_doc(
+        self,
+        title: str,
+        summary: str,
+        definitions: List[Dict[str, str]],
+        takeaways: List[str],
+        deep_research: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        # Create document
+        doc_title = f"{title} - {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
+        body = {'title': doc_title}
+        doc = self.docs_service.documents().create(body=body).execute()
+        doc_id = doc['documentId']
+        logger.info(f'[GoogleDocs] Created document: {doc_id}')
+        
+        # Prepare content for insertion
+        requests = self._build_requests(doc_id, title, summary, definitions, takeaways, deep_research)
+        
+        # Apply formatting
+        if requests:
+            self.docs_service.documents().batchUpdate(
+                documentId=doc_id,
+                body={'requests': requests}
+            ).execute()
+            logger.info(f'[GoogleDocs] Formatted document: {doc_id}')
+        
+        # The edit link follows from the document id, no Drive lookup needed
+        web_view_link = f'https://docs.google.com/document/d/{doc_id}/edit'
+        logger.info(f'[GoogleDocs] Document ready: {web_view_link}')
+        
+        return {
+            'doc_id': doc_id,
+            'doc_url': web_view_link,
+            'web_view_link': web_view_link,
+            'title': doc_title
+        }
+    
     def _build_requests(
         self,
         doc_id: str,
@@ -126,89 +155,89 @@ class GoogleDocsService:
         takeaways: List[str],
         deep_research: List[Dict[str, str]]
     ) -> List[Dict[str, Any]]:
-        """Build batch update requests for formatting the document."""
-        requests = []
+        """Build batch update requests for formatting the document.
         
-        # Main content to insert
-        content_parts = [f"{title}\n\n"]
+        Text is inserted with a single insertText request; the ranges to
+        style are recorded while the text is assembled, so no offsets have
+        to be searched for afterwards.
+        """
+        parts: List[str] = []
+        styled: List[tuple] = []  # (start index, end index, font size)
+        cursor = 1  # the document body starts at index 1
+        
+        def append(text: str, font_size: Optional[int] = None) -> None:
+            nonlocal cursor
+            # Docs indices count UTF-16 code units, not Python characters;
+            # for ASCII text (isascii() is O(1)) the two are the same
+            if text.isascii():
+                end = cursor + len(text)
+            else:
+                end = cursor + len(text.encode('utf-16-le')) // 2
+            if font_size:
+                styled.append((cursor, end, font_size))
+            parts.append(text)
+            cursor = end
+        
+        append(title, font_size=24)
+        append("\n\n")
         
         # Add summary
-        content_parts.append("LECTURE SUMMARY\n")
-        content_parts.append(f"{summary}\n\n")
+        append("LECTURE SUMMARY", font_size=14)
+        append(f"\n{summary}\n\n")
         
         # Add key takeaways if available
         if takeaways:
-            content_parts.append("KEY TAKEAWAYS\n")
+            append("KEY TAKEAWAYS", font_size=14)
+            append("\n")
             for takeaway in takeaways:
-                content_parts.append(f"• {takeaway}\n")
-            content_parts.append("\n")
+                # Escaped so the bullet survives any re-encoding of this file
+                append(f"\u2022 {takeaway}\n")
+            append("\n")
         
         # Add definitions if available
         if definitions:
-            content_parts.append("KEY CONCEPTS\n")
+            append("KEY CONCEPTS", font_size=14)
+            append("\n")
             for defn in definitions:
-                content_parts.append(f"\n{defn.get('term', 'Unknown')}")
+                append(f"\n{defn.get('term', 'Unknown')}")
                 if defn.get('type'):
-                    content_parts.append(f" ({defn['type']})")
-                content_parts.append("\n")
-                content_parts.append(f"{defn.get('definition', 'No definition available')}\n")
-            content_parts.append("\n")
+                    append(f" ({defn['type']})")
+                append("\n")
+                append(f"{defn.get('definition', 'No definition available')}\n")
+            append("\n")
         
         # Add deep research if available
         if deep_research:
-            content_parts.append("RESEARCH INSIGHTS\n")
+            append("RESEARCH INSIGHTS", font_size=14)
+            append("\n")
             for research in deep_research:
                 if research.get('query'):
-                    content_parts.append(f"\nResearch: {research['query']}\n")
+                    append(f"\nResearch: {research['query']}\n")
                 if research.get('synthesis'):
-                    content_parts.append(f"{research['synthesis']}\n")
-            content_parts.append("\n")
+                    append(f"{research['synthesis']}\n")
+            append("\n")
         
         # Add timestamp
-        content_parts.append(f"\nGenerated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}")
-        
-        full_content = ''.join(content_parts)
+        append(f"\nGenerated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}")
         
-        # Insert text at the end of the document
-        requests.append({
+        # Insert text at the start of the document body, then style it
+        requests: List[Dict[str, Any]] = [{
             'insertText': {
                 'location': {'index': 1},
-                'text': full_content
-            }
-        })
-        
-        # Format title (first paragraph)
-        title_end_index = len(title) + 2
-        requests.append({
-            'updateTextStyle': {
-                'range': {'startIndex': 1, 'endIndex': title_end_index},
-                'textStyle': {
-                    'fontSize': {'magnitude': 24, 'unit': 'pt'},
-                    'bold': True
-                },
-                'fields': 'fontSize,bold'
+                'text': ''.join(parts)
             }
-        })
-        
-        # Format section headers
-        current_index = title_end_index
-        sections = ['LECTURE SUMMARY', 'KEY TAKEAWAYS', 'KEY CONCEPTS', 'RESEARCH INSIGHTS']
-        
-        for section in sections:
-            idx = full_content.find(section, current_index - title_end_index)
-            if idx != -1:
-                actual_idx = idx + title_end_index
-                section_end = actual_idx + len(section)
-                requests.append({
-                    'updateTextStyle': {
-                        'range': {'startIndex': actual_idx, 'endIndex': section_end},
-                        'textStyle': {
-                            'fontSize': {'magnitude': 14, 'unit': 'pt'},
-                            'bold': True
-                        },
-                        'fields': 'fontSize,bold'
-                    }
-                })
+        }]
+        for start, end, font_size in styled:
+            requests.append({
+                'updateTextStyle': {
+                    'range': {'startIndex': start, 'endIndex': end},
+                    'textStyle': {
+                        'fontSize': {'magnitude': font_size, 'unit': 'pt'},
+                        'bold': True
+                    },
+                    'fields': 'fontSize,bold'
+                }
+            })
         
         return requests
 
@@ -6,46 +6,47 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Optional
-
-from openai import AsyncOpenAI
+from typing import AsyncIterator, Optional
 
+import orjson
+from pydantic import ValidationError
 from config import get_settings
+from models.events import DefinitionBatch
+from services.cache import normalise_term
+from services.llm_clients import get_groq_client
+from services.ratelimit import get_groq_slots, note_rate_limit
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-_MODEL = "llama-3.1-8b-instant"
-_SEARCH_MODEL = "groq/compound"  # Model with built-in web search
-_client: AsyncOpenAI | None = None
-
-
-def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(
-            api_key=settings.groq_api_key,
-            base_url="https://api.groq.com/openai/v1",
-        )
-    return _client
+_MODEL = settings.groq_definition_model
 
 
 # ============================================================================
 # CONDENSED PROMPTS - Readable in < 1 minute
 # ============================================================================
 
+# Instructions come first and the term/context last, so every call to a
+# prompt shares the same leading tokens and Groq can reuse its prefix cache.
+# The constants hold only the instructions; the input is appended with an
+# f-string, so no template is re-parsed per call.
+
 _DEFINITION_PROMPT = """Define this term in 1-3 sentences using the lecture context.
+Brief definition only - no citations needed.
 
-Term: {term}
-Context: {context}
+"""
 
-Brief definition only - no citations needed."""
 
+_BATCH_DEFINITION_PROMPT = """Define each term in 1-3 sentences using the lecture context.
+Return JSON only: {"definitions": [{"term": "...", "content": "..."}]}
+One entry per term, spelled exactly as given. No citations.
+
+"""
+
+_BADGE_TYPES = frozenset({"person", "event", "concept"})
 
-_DEEP_RESEARCH_PROMPT = """Explain this topic concisely for a student. Keep it SHORT (max 150 words).
 
-Topic: {term}
-Lecture Context: {context}
+_DEEP_RESEARCH_PROMPT = """Explain this topic concisely for a student. Keep it SHORT (max 150 words).
 
 Format your answer as:
 
@@ -55,7 +56,15 @@ Format your answer as:
 
 **Example:** One concrete real-world case.
 
-That's it. Be concise."""
+That's it. Be concise.
+
+"""
+
+
+async def _complete(**params):
+    """chat.completions.create, holding one of the shared Groq slots."""
+    async with get_groq_slots():
+        return await get_groq_client().chat.completions.create(**params)
 
 
 async def auto_define(term: str, context_tail: str) -> Optional[dict]:
@@ -65,10 +74,10 @@ async def auto_define(term: str, context_tail: str) -> Optional[dict]:
         logger.warning("[Groq] Empty term provided to auto_define")
         return None
 
-    prompt = _DEFINITION_PROMPT.format(term=term, context=context_tail[-200:])
+    prompt = f"{_DEFINITION_PROMPT}Term: {term}\nContext: {context_tail[-200:]}"
     try:
         logger.debug(f"[Groq] Sending definition request to Groq for term: '{term}'")
-        response = await _get_client().chat.completions.create(
+        response = await _complete(
             model=_MODEL,
             messages=[
                 {"role": "user", "content": prompt}
@@ -89,6 +98,7 @@ async def auto_define(term: str, context_tail: str) -> Optional[dict]:
             "badge_type": "concept",
         }
     except Exception as exc:
+        note_rate_limit(exc)
         logger.error(f"[Groq] Definition failed for '{term}': {type(exc).__name__}: {str(exc)}", exc_info=True)
         return None
 
@@ -96,111 +106,104 @@ async def auto_define(term: str, context_tail: str) -> Optional[dict]:
 async def auto_define_batch(
     terms: list[dict],
     context_tail: str,
-) -> list[dict]:
-    """Run auto_define concurrently for all terms and return successful results."""
+) -> AsyncIterator[dict]:
+    """Define all terms with one Groq call and yield the successful results.
 
-    async def _define_one(item: dict) -> Optional[dict]:
-        result = await auto_define(item.get("term", ""), context_tail)
-        if result:
-            type_map = {"person": "person", "event": "event", "concept": "concept"}
-            result["badge_type"] = type_map.get(item.get("type", "concept"), "concept")
-        return result
+    The reply budget is 128 tokens per term, so callers keep batches small
+    (hedged_info_service splits them).
+    """
+    items = [item for item in terms if item.get("term", "").strip()]
+    if not items:
+        return
+
+    # Sliced once for the batch call and any per-term fallback
+    context = context_tail[-200:]
+    terms_json = orjson.dumps([item["term"] for item in items]).decode()
+    prompt = f"{_BATCH_DEFINITION_PROMPT}Terms: {terms_json}\nContext: {context}"
+    try:
+        response = await _complete(
+            model=_MODEL,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=128 * len(items),
+            response_format={"type": "json_object"},
+        )
+    except Exception as exc:
+        note_rate_limit(exc)
+        logger.error(f"[Groq] Batch definition failed for {len(items)} terms: {type(exc).__name__}: {str(exc)}")
+        return
 
-    tasks = [_define_one(item) for item in terms]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    return [r for r in results if isinstance(r, dict)]
+    try:
+        batch = DefinitionBatch.model_validate_json(response.choices[0].message.content)
+    except ValidationError as exc:
+        # The call itself worked, so the terms are worth asking for one by one
+        logger.warning(f"[Groq] Unusable batch reply, defining {len(items)} terms singly: {exc}")
+        singles = await asyncio.gather(*(auto_define(item["term"], context) for item in items))
+        contents = {normalise_term(r["term"]): r["content"] for r in singles if r}
+    else:
+        contents = {normalise_term(d.term): d.content.strip() for d in batch.definitions}
+
+    defined = 0
+    for item in items:
+        content = contents.get(normalise_term(item["term"]))
+        if not content:
+            continue
+        badge_type = item.get("type", "concept")
+        defined += 1
+        yield {
+            "term": item["term"],
+            "content": content,
+            "citations": [],
+            "sources": [],
+            "badge_type": badge_type if badge_type in _BADGE_TYPES else "concept",
+        }
+    logger.info(f"[Groq] Batch defined {defined}/{len(items)} terms")
 
 
 async def deep_research(term: str, context: str) -> Optional[dict]:
-    """Deep research with web search using groq/compound model (fallback to llama).
+    """Short research explainer for a topic.
     
     Returns dict with:
     - term: research topic
     - content: synthesized answer
-    - citations: list of {title, url} formatted for display
-    - sources: raw search results with relevance scores
-    - badge_type: "research"
+    - citations: always empty (no web search)
+    - sources: always empty (no web search)
+    - badge_type: "Research"
     """
     logger.info(f"[Groq] 🔍 deep_research starting for: '{term}'")
     if not term.strip():
         logger.warning("[Groq] Empty term provided to deep_research")
         return None
 
-    prompt = _DEEP_RESEARCH_PROMPT.format(term=term, context=context[:400])
-    
-    # Try groq/compound first, fallback to regular model
-    model_to_use = _SEARCH_MODEL
-    search_params = {
-        "model": model_to_use,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7,
-        "max_tokens": 1024,
-    }
-    
-    # Only add search_settings if using groq/compound
-    if model_to_use == _SEARCH_MODEL:
-        try:
-            search_params["search_settings"] = {
-                "exclude_domains": ["twitter.com", "x.com", "instagram.com"]
-            }
-        except Exception:
-            logger.debug("[Groq] search_settings not supported, will try without it")
-            pass
+    prompt = f"{_DEEP_RESEARCH_PROMPT}Topic: {term}\nLecture Context: {context[:400]}"
     
     try:
-        logger.debug(f"[Groq] Requesting {model_to_use} for: '{term}'")
-        
-        try:
-            # Try with search settings first
-            response = await _get_client().chat.completions.create(**search_params)
-        except (TypeError, AttributeError) as e:
-            # If search_settings isn't supported, try without it
-            logger.warning(f"[Groq] search_settings not supported, falling back to standard model: {e}")
-            search_params.pop("search_settings", None)
-            search_params["model"] = _MODEL  # Use regular model instead
-            response = await _get_client().chat.completions.create(**search_params)
+        logger.debug(f"[Groq] Requesting {_MODEL} for: '{term}'")
+        response = await _complete(
+            model=_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=1024,
+        )
         
         content = response.choices[0].message.content.strip()
         if not content:
-            logger.warning(f"[Groq] Empty response from {search_params['model']} for: '{term}'")
+            logger.warning(f"[Groq] Empty response from {_MODEL} for: '{term}'")
             return None
 
-        # Extract sources from web search (if available)
-        sources = []
-        citations = []
-        
-        if hasattr(response.choices[0].message, 'executed_tools') and response.choices[0].message.executed_tools:
-            logger.debug(f"[Groq] Found {len(response.choices[0].message.executed_tools)} executed tools")
-            for tool in response.choices[0].message.executed_tools:
-                if hasattr(tool, 'search_results') and tool.search_results:
-                    logger.info(f"[Groq] Extracted {len(tool.search_results)} search results")
-                    for result in tool.search_results:
-                        source = {
-                            "url": result.get("url", ""),
-                            "title": result.get("title", ""),
-                            "snippet": result.get("content", ""),
-                            "relevance": float(result.get("score", 0.0))
-                        }
-                        sources.append(source)
-                        
-                        # Format for citations display
-                        if result.get("title") and result.get("url"):
-                            citations.append({
-                                "title": result.get("title"),
-                                "url": result.get("url"),
-                                "domain": result.get("url", "").split("/")[2] if result.get("url") else ""
-                            })
-        
-        logger.info(f"[Groq] ✅ deep_research complete for '{term}': {len(content)} chars, {len(sources)} sources")
+        logger.info(f"[Groq] ✅ deep_research complete for '{term}': {len(content)} chars")
         
         return {
             "term": term,
             "content": content,
-            "citations": citations[:5],  # Top 5 citations
-            "sources": sources[:5],      # Top 5 sources with scores
+            "citations": [],
+            "sources": [],
             "badge_type": "Research",
         }
         
     except Exception as exc:
+        note_rate_limit(exc)
         logger.error(f"[Groq] ❌ deep_research failed for '{term}': {type(exc).__name__}: {str(exc)}", exc_info=True)
         return None
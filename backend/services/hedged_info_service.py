@@ -0,0 +1,127 @@
+"""
+services/hedged_info_service.py - definitions and deep research raced across providers
+Groq answers first in the common case; Gemini is started as a hedge when Groq
+is slow or fails, and whichever returns a result first wins.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from config import get_settings
+from services import gemini_info_service, groq_info_service
+from services.cache import cached_response, get_cached_response, put_cached_response
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+# How long Groq gets on its own before Gemini is started alongside it
+HEDGE_DELAY_SECONDS = 0.15
+
+# Terms per raced batch call; each chunk's cards are yielded as soon as it
+# lands instead of waiting for the slowest one. At Groq's 128 reply tokens
+# per term this keeps a call within 1024.
+DEFINE_CHUNK_TERMS = 8
+
+
+async def _race(*calls: Callable[[], Awaitable[Optional[T]]]) -> Optional[T]:
+    """First non-empty result of `calls`.
+
+    Each call is started HEDGE_DELAY_SECONDS after the previous one, or at
+    once if every earlier call has already failed. The losers are cancelled.
+    """
+    pending: set[asyncio.Task] = set()
+    try:
+        for i, call in enumerate(calls):
+            pending.add(asyncio.create_task(call()))
+            timeout = HEDGE_DELAY_SECONDS if i < len(calls) - 1 else None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if not task.cancelled() and task.exception() is None and task.result():
+                        return task.result()
+                if timeout is not None:
+                    # Hedge delay elapsed or a call failed: start the next one
+                    break
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _providers(
+    groq_call: Callable[[], Awaitable[T]],
+    gemini_call: Callable[[], Awaitable[T]],
+) -> tuple[Callable[[], Awaitable[T]], ...]:
+    # Without a Gemini key there is nothing to hedge with
+    return (groq_call, gemini_call) if settings.gemini_api_key else (groq_call,)
+
+
+@cached_response("define")
+async def auto_define(term: str, context_tail: str) -> Optional[dict]:
+    """Definition card from whichever provider answers first, or None."""
+    return await _race(*_providers(
+        lambda: groq_info_service.auto_define(term, context_tail),
+        lambda: gemini_info_service.auto_define(term, context_tail),
+    ))
+
+
+async def auto_define_batch(
+    terms: list[dict],
+    context_tail: str,
+) -> AsyncIterator[dict]:
+    """Definitions for all terms as they arrive: cached ones straight away,
+    the rest in chunks of DEFINE_CHUNK_TERMS, each raced across providers."""
+    missing = []
+    for item in terms:
+        hit = get_cached_response("define", item.get("term", ""), context_tail)
+        if hit is None:
+            missing.append(item)
+            continue
+        badge_type = item.get("type", "concept")
+        hit["badge_type"] = badge_type if badge_type in ("person", "event", "concept") else "concept"
+        yield hit
+
+    pending = {
+        asyncio.create_task(_define_chunk(missing[i:i + DEFINE_CHUNK_TERMS], context_tail))
+        for i in range(0, len(missing), DEFINE_CHUNK_TERMS)
+    }
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    logger.error("Batch definition chunk failed: %r", task.exception())
+                    continue
+                for result in task.result():
+                    put_cached_response("define", result["term"], context_tail, result)
+                    yield result
+    finally:
+        # The caller stopped early: don't leave chunk calls running
+        for task in pending:
+            task.cancel()
+
+
+async def _define_chunk(chunk: list[dict], context_tail: str) -> list[dict]:
+    return await _race(*_providers(
+        lambda: _collect(groq_info_service.auto_define_batch(chunk, context_tail)),
+        lambda: _collect(gemini_info_service.auto_define_batch(chunk, context_tail)),
+    )) or []
+
+
+async def _collect(results: AsyncIterator[T]) -> list[T]:
+    return [result async for result in results]
+
+
+@cached_response("research")
+async def deep_research(term: str, context: str) -> Optional[dict]:
+    """Deep research card from whichever provider answers first, or None."""
+    return await _race(*_providers(
+        lambda: groq_info_service.deep_research(term, context),
+        lambda: gemini_info_service.deep_research(term, context),
+    ))
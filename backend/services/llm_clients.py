@@ -0,0 +1,107 @@
+"""
+services/llm_clients.py — lazily built LLM SDK clients shared by all services,
+on one pooled HTTP/2 connection by default
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import google.genai as genai
+import httpx
+from google.genai import types
+from openai import AsyncOpenAI, DefaultAioHttpClient
+
+try:
+    import h2  # noqa: F401  (httpx's HTTP/2 support, from httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_http: httpx.AsyncClient | None = None
+_groq: AsyncOpenAI | None = None
+_groq_shares_http = True
+_gemini: genai.Client | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide client, so Groq and Gemini calls reuse warm connections
+    instead of each SDK client paying its own TCP/TLS handshakes."""
+    global _http
+    if _http is None:
+        if not HTTP2_AVAILABLE:
+            # httpx raises on http2=True without h2; pooled HTTP/1.1 still works
+            logger.warning("h2 not installed; LLM calls fall back to HTTP/1.1")
+        _http = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=64,
+                max_keepalive_connections=32,
+                keepalive_expiry=60,
+            ),
+        )
+    return _http
+
+
+def _groq_http_client() -> httpx.AsyncClient:
+    """The shared client, or with GROQ_HTTP_TRANSPORT=aiohttp a dedicated
+    aiohttp-backed one, which holds up better under many concurrent calls."""
+    if settings.groq_http_transport == "aiohttp":
+        try:
+            return DefaultAioHttpClient()
+        except RuntimeError as exc:
+            logger.warning("aiohttp transport unavailable, using httpx: %s", exc)
+    return get_http_client()
+
+
+def get_groq_client() -> AsyncOpenAI:
+    global _groq, _groq_shares_http
+    if _groq is None:
+        http_client = _groq_http_client()
+        _groq_shares_http = http_client is get_http_client()
+        _groq = AsyncOpenAI(
+            api_key=settings.groq_api_key,
+            base_url="https://api.groq.com/openai/v1",
+            http_client=http_client,
+        )
+    return _groq
+
+
+def get_gemini_client() -> genai.Client:
+    global _gemini
+    if _gemini is None:
+        _gemini = genai.Client(
+            api_key=settings.gemini_api_key,
+            http_options=types.HttpOptions(httpx_async_client=get_http_client()),
+        )
+    return _gemini
+
+
+async def warm_up_llm_clients() -> None:
+    """Open the provider connections ahead of the first real call, so it
+    doesn't pay DNS, TCP and TLS setup. Failures are only logged."""
+    calls = []
+    if settings.groq_api_key:
+        # Through the SDK client, so whichever transport it uses gets warmed
+        calls.append(get_groq_client().with_options(max_retries=0).models.list())
+    if settings.gemini_api_key:
+        calls.append(get_http_client().head("https://generativelanguage.googleapis.com/"))
+    for result in await asyncio.gather(*calls, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.warning("LLM connection warm-up failed: %s", result)
+
+
+async def close_llm_clients() -> None:
+    global _http, _groq, _gemini
+    if _groq is not None and not _groq_shares_http:
+        await _groq.close()
+    _groq = _gemini = None
+    if _http is not None:
+        await _http.aclose()
+        _http = None
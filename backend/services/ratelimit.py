@@ -0,0 +1,131 @@
+"""
+services/ratelimit.py — process-wide token bucket for LLM request/token quotas
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Optional
+
+from openai import RateLimitError
+
+from config import get_settings
+
+settings = get_settings()
+
+_MAX_BACKOFF_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Requests-per-minute and tokens-per-minute budget shared by all sessions.
+
+    Both budgets refill continuously. acquire() waits until a call fits in
+    both; callers are served one at a time, in arrival order.
+    """
+
+    def __init__(self, rpm: int, tpm: int) -> None:
+        self._rpm = rpm
+        self._tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._backoff = 0.0
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self._rpm, self._requests + elapsed * self._rpm / 60)
+        self._tokens = min(self._tpm, self._tokens + elapsed * self._tpm / 60)
+
+    async def acquire(self, estimated_tokens: int, requests: int = 1) -> None:
+        """Wait until `requests` calls totalling `estimated_tokens` fit the budget."""
+        # A call larger than a whole bucket could never fit; let it take all of it
+        requests = min(requests, self._rpm)
+        estimated_tokens = min(estimated_tokens, self._tpm)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._requests >= requests and self._tokens >= estimated_tokens:
+                        self._requests -= requests
+                        self._tokens -= estimated_tokens
+                        return
+                    wait = max(
+                        (requests - self._requests) * 60 / self._rpm,
+                        (estimated_tokens - self._tokens) * 60 / self._tpm,
+                    )
+                await asyncio.sleep(wait)
+
+    def try_acquire(self, estimated_tokens: int, spare_requests: int = 0) -> bool:
+        """Take the budget for one call only if it is free right now, leaving
+        at least `spare_requests` calls for others. Never waits; meant for
+        optional work that must not delay real calls."""
+        if self._lock.locked():
+            return False  # callers are already waiting for budget
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._blocked_until:
+            return False
+        if self._requests < 1 + spare_requests or self._tokens < estimated_tokens:
+            return False
+        self._requests -= 1
+        self._tokens -= estimated_tokens
+        return True
+
+    def backoff(self, retry_after: Optional[float] = None) -> None:
+        """Upstream refused or failed a call: pause everyone, doubling each time in a row.
+
+        A `retry_after` from the provider is used as the pause instead.
+        Never shortens a pause already in effect.
+        """
+        if retry_after is not None:
+            pause = min(retry_after, _MAX_BACKOFF_SECONDS)
+        else:
+            self._backoff = min(max(self._backoff * 2, 1.0), _MAX_BACKOFF_SECONDS)
+            pause = self._backoff
+        self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+    def reset_backoff(self) -> None:
+        self._backoff = 0.0
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough prompt size: ~4 characters per token."""
+    return sum(len(t) for t in texts) // 4
+
+
+_groq_bucket: TokenBucket | None = None
+
+
+def get_groq_bucket() -> TokenBucket:
+    global _groq_bucket
+    if _groq_bucket is None:
+        _groq_bucket = TokenBucket(settings.groq_rpm, settings.groq_tpm)
+    return _groq_bucket
+
+
+_groq_slots: asyncio.Semaphore | None = None
+
+
+def get_groq_slots() -> asyncio.Semaphore:
+    """Caps the Groq calls in flight across all sessions, so a burst of
+    requests queues here instead of turning into a burst of 429s."""
+    global _groq_slots
+    if _groq_slots is None:
+        _groq_slots = asyncio.Semaphore(settings.groq_max_concurrency)
+    return _groq_slots
+
+
+def note_rate_limit(exc: BaseException) -> None:
+    """If `exc` is a Groq 429, pause the shared bucket for its Retry-After."""
+    if not isinstance(exc, RateLimitError):
+        return
+    try:
+        retry_after: Optional[float] = float(exc.response.headers["retry-after"])
+    except (KeyError, ValueError):
+        retry_after = None
+    get_groq_bucket().backoff(retry_after)
@@ -2,22 +2,21 @@
 services/smallest_service.py - Smallest.ai Pulse streaming transcription per lecture session
 
 Architecture:
-  - A background thread runs an asyncio loop for the Smallest.ai WebSocket.
-  - Audio chunks are queued from the FastAPI loop and streamed as binary frames.
+  - A task on the FastAPI event loop holds the Smallest.ai WebSocket.
+  - Audio chunks are queued by the WS handler and streamed as binary frames.
   - Transcripts are pushed into asyncio queues for the WS handler to consume.
   - A rolling transcript buffer is maintained per session.
 """
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
 import logging
-import queue
-import threading
 import time
 from typing import Optional
 from urllib.parse import urlencode
 
+import orjson
 import websockets
 
 from config import get_settings
@@ -25,29 +24,77 @@ from config import get_settings
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# End-of-stream message, serialized once; a text frame, since binary
+# frames are read as audio
+_FINALIZE_FRAME = orjson.dumps({"type": "finalize"}).decode()
+
+_TRANSCRIPT_KEY = '"transcript"'
+_EMPTY_TRANSCRIPTS = ('"transcript":""', '"transcript": ""')
+_TRANSCRIPT_KEY_BYTES = _TRANSCRIPT_KEY.encode()
+_EMPTY_TRANSCRIPTS_BYTES = tuple(e.encode() for e in _EMPTY_TRANSCRIPTS)
+
+
+@functools.cache
+def _ws_query() -> str:
+    """Stream options for the connection URL; settings don't change at
+    runtime, so this is encoded once."""
+    return urlencode({
+        "language": settings.smallest_language,
+        "encoding": settings.smallest_encoding,
+        "sample_rate": str(settings.smallest_sample_rate),
+        "word_timestamps": "true" if settings.smallest_word_timestamps else "false",
+    })
+
+
+def _may_have_transcript(message: str | bytes) -> bool:
+    """Cheap substring test: False only when the frame certainly has no
+    transcript text (no key at all, or an empty string for it)."""
+    if isinstance(message, str):
+        key, empties = _TRANSCRIPT_KEY, _EMPTY_TRANSCRIPTS
+    else:
+        key, empties = _TRANSCRIPT_KEY_BYTES, _EMPTY_TRANSCRIPTS_BYTES
+    if key not in message:
+        return False
+    return not any(empty in message for empty in empties)
+
 
 class SmallestSession:
     """Manages one Smallest.ai streaming connection for a single lecture session."""
 
     BUFFER_MAX = 2000  # characters kept in rolling transcript buffer
+    STOP_TIMEOUT = 5.0  # seconds the finalize handshake gets before cancelling
+    INTERIM_QUEUE_MAX = 256
+    UTTERANCE_QUEUE_MAX = 1024
+    # Audio queued within this window is sent as one frame, up to this size
+    SEND_COALESCE_SECONDS = 0.02
+    SEND_COALESCE_BYTES = 8192
 
     def __init__(self, lecture_id: str, loop: asyncio.AbstractEventLoop) -> None:
         self.lecture_id = lecture_id
         self._loop = loop
 
-        # Queue items: (text, speaker, timestamp_seconds, is_final)
-        self.interim_queue: asyncio.Queue[tuple[str, Optional[int], int, bool]] = asyncio.Queue()
-
-        # Queue for finalized utterances only: (text, speaker, timestamp_seconds)
-        self.utterance_queue: asyncio.Queue[tuple[str, Optional[int], int]] = asyncio.Queue()
-
-        self._full_transcript: str = ""
+        # Queue items: (text, speaker, timestamp_seconds, is_final). Bounded;
+        # when the consumer falls behind the oldest interim results are dropped
+        self.interim_queue: asyncio.Queue[tuple[str, Optional[int], int, bool]] = asyncio.Queue(
+            maxsize=self.INTERIM_QUEUE_MAX
+        )
+        self.interim_dropped = 0
+
+        # Queue for finalized utterances only: (text, speaker, timestamp_seconds).
+        # Bounded but never dropped: a full queue stops reading from Smallest.ai
+        self.utterance_queue: asyncio.Queue[tuple[str, Optional[int], int]] = asyncio.Queue(
+            maxsize=self.UTTERANCE_QUEUE_MAX
+        )
+
+        # Final utterances in order; the transcript is their space-joined
+        # text, built lazily and cached as (utterance count, text)
+        self._utterances: list[str] = []
+        self._joined: tuple[int, str] = (0, "")
         self._start_time: float = time.time()
-        self._ready_event = threading.Event()
-        self._stop_event = threading.Event()
-        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = False
         self._paused = False
-        self._audio_queue: queue.Queue[Optional[bytes]] = queue.Queue()
+        self._audio_queue: asyncio.Queue[Optional[bytes | memoryview]] = asyncio.Queue()
 
     # ------------------------------------------------------------------
     # Public helpers
@@ -55,10 +102,38 @@ class SmallestSession:
 
     @property
     def full_transcript(self) -> str:
-        return self._full_transcript
+        count = len(self._utterances)
+        joined_count, joined = self._joined
+        if joined_count != count:
+            # Only the utterances added since the last read are joined on
+            new = " ".join(self._utterances[joined_count:count])
+            joined = f"{joined} {new}" if joined else new
+            self._joined = (count, joined)
+        return joined
+
+    def transcript_since(self, count: int) -> tuple[int, str]:
+        """(utterance count, text added after the first `count` utterances).
+
+        The text is what full_transcript grew by, leading space included,
+        so successive results concatenate to the full transcript without
+        ever building it.
+        """
+        total = len(self._utterances)
+        if total <= count:
+            return total, ""
+        new = " ".join(self._utterances[count:total])
+        return total, f" {new}" if count else new
 
     def get_context_tail(self, chars: int = 200) -> str:
-        return self._full_transcript[-chars:]
+        # Walk back over just enough utterances to cover `chars`
+        tail: list[str] = []
+        size = -1  # joined length: texts plus one space between each
+        for text in reversed(self._utterances):
+            tail.append(text)
+            size += len(text) + 1
+            if 0 < chars <= size:
+                break
+        return " ".join(reversed(tail))[-chars:]
 
     def elapsed_seconds(self) -> int:
         return int(time.time() - self._start_time)
@@ -68,17 +143,19 @@ class SmallestSession:
     # ------------------------------------------------------------------
 
     def start(self) -> None:
-        """Spawn the Smallest.ai thread and wait until the connection is ready."""
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
-        self._ready_event.wait(timeout=10)
+        """Open the Smallest.ai connection in a task on the session's loop.
+
+        Audio sent before the connection is up waits in the queue.
+        """
+        self._task = self._loop.create_task(self._run_async())
 
     def stop(self) -> None:
-        """Signal the Smallest.ai thread to close and join it."""
-        self._stop_event.set()
-        self._audio_queue.put(None)
-        if self._thread:
-            self._thread.join(timeout=5)
+        """Finalize the stream and let the connection close, cancelling it if
+        it hasn't within STOP_TIMEOUT seconds."""
+        self._stopped = True
+        self._audio_queue.put_nowait(None)
+        if self._task and not self._task.done():
+            self._loop.call_later(self.STOP_TIMEOUT, self._task.cancel)
 
     def pause(self) -> None:
         self._paused = True
@@ -86,31 +163,24 @@ class SmallestSession:
     def resume(self) -> None:
         self._paused = False
 
-    def send_audio(self, chunk: bytes) -> None:
-        """Forward a raw audio chunk to Smallest.ai (no-op if paused or stopped)."""
-        if self._paused or self._stop_event.is_set():
+    def send_audio(self, chunk: bytes | memoryview) -> None:
+        """Forward a raw audio chunk to Smallest.ai (no-op if paused or stopped).
+
+        The chunk is queued by reference; it is copied only when coalesced
+        with others into one frame.
+        """
+        if self._paused or self._stopped:
             return
-        self._audio_queue.put(chunk)
+        if self._task is not None and self._task.done():
+            return  # connection is gone; nothing would ever send this
+        self._audio_queue.put_nowait(chunk)
 
     # ------------------------------------------------------------------
     # Internal
     # ------------------------------------------------------------------
 
     def _build_ws_url(self) -> str:
-        params = {
-            "language": settings.smallest_language,
-            "encoding": settings.smallest_encoding,
-            "sample_rate": str(settings.smallest_sample_rate),
-            "word_timestamps": "true" if settings.smallest_word_timestamps else "false",
-        }
-        return f"{settings.smallest_ws_url}?{urlencode(params)}"
-
-    def _run(self) -> None:
-        try:
-            asyncio.run(self._run_async())
-        except Exception as exc:
-            logger.exception("[%s] Smallest.ai thread error: %s", self.lecture_id, exc)
-            self._ready_event.set()
+        return f"{settings.smallest_ws_url}?{_ws_query()}"
 
     async def _run_async(self) -> None:
         if not settings.smallest_api_key:
@@ -139,7 +209,6 @@ class SmallestSession:
 
             async with connect_ctx as websocket:
                 logger.info("[%s] Smallest.ai connection opened", self.lecture_id)
-                self._ready_event.set()
 
                 sender_task = asyncio.create_task(self._sender(websocket))
                 receiver_task = asyncio.create_task(self._receiver(websocket))
@@ -163,28 +232,87 @@ class SmallestSession:
 
         except Exception as exc:
             logger.exception("[%s] Smallest.ai connection error: %s", self.lecture_id, exc)
-            self._ready_event.set()
 
     async def _sender(self, websocket: websockets.WebSocketClientProtocol) -> None:
-        loop = asyncio.get_running_loop()
-        while not self._stop_event.is_set():
-            chunk = await loop.run_in_executor(None, self._audio_queue.get)
+        while True:
+            chunk = await self._audio_queue.get()
             if chunk is None:
-                await websocket.send(json.dumps({"type": "finalize"}))
+                await websocket.send(_FINALIZE_FRAME)
                 return
+            parts, finished = await self._coalesce_audio(chunk)
             try:
-                await websocket.send(chunk)
+                # Raw PCM concatenates cleanly; a lone chunk is sent uncopied
+                await websocket.send(parts[0] if len(parts) == 1 else b"".join(parts))
+                if finished:
+                    await websocket.send(_FINALIZE_FRAME)
+                    return
             except Exception as exc:
                 logger.warning("[%s] send_audio error: %s", self.lecture_id, exc)
                 return
 
+    async def _coalesce_audio(self, chunk: bytes | memoryview) -> tuple[list[bytes | memoryview], bool]:
+        """`chunk` plus whatever audio arrives within SEND_COALESCE_SECONDS, up to
+        SEND_COALESCE_BYTES, so one frame goes out instead of several.
+
+        Returns (chunks, whether the end-of-stream marker was reached).
+        """
+        loop = asyncio.get_running_loop()
+        parts = [chunk]
+        size = len(chunk)
+        deadline = loop.time() + self.SEND_COALESCE_SECONDS
+        while size < self.SEND_COALESCE_BYTES:
+            try:
+                nxt = self._audio_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = await asyncio.wait_for(self._audio_queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if nxt is None:
+                return parts, True
+            parts.append(nxt)
+            size += len(nxt)
+        return parts, False
+
+    async def _put_interim(self, item: tuple[str, Optional[int], int, bool]) -> None:
+        """Queue a result for the WS handler.
+
+        When the queue is full the oldest interim result is dropped to make
+        room. Finals are never dropped: with only finals queued, an interim
+        is discarded and a final waits for the consumer.
+        """
+        queue = self.interim_queue
+        if queue.full():
+            # Drained and refilled in order; no await in between, so the
+            # consumer never sees the queue mid-rebuild
+            queued = [queue.get_nowait() for _ in range(queue.qsize())]
+            stale = next((i for i, q in enumerate(queued) if not q[3]), None)
+            if stale is not None:
+                del queued[stale]
+            for q in queued:
+                queue.put_nowait(q)
+            if stale is not None or not item[3]:
+                self.interim_dropped += 1
+                if self.interim_dropped % 100 == 1:
+                    logger.warning(
+                        "[%s] Interim queue full, %d results dropped so far",
+                        self.lecture_id, self.interim_dropped,
+                    )
+                if stale is None:
+                    return
+        await queue.put(item)
+
     async def _receiver(self, websocket: websockets.WebSocketClientProtocol) -> None:
         async for message in websocket:
+            # Most frames carry no transcript; skip those before parsing
+            if not _may_have_transcript(message):
+                continue
             try:
-                if isinstance(message, bytes):
-                    message = message.decode("utf-8", errors="ignore")
-
-                payload = json.loads(message)
+                # orjson parses str and bytes frames alike
+                payload = orjson.loads(message)
                 text = payload.get("transcript", "") or ""
                 if not text:
                     continue
@@ -194,20 +322,11 @@ class SmallestSession:
                 speaker: Optional[int] = None
 
                 if is_final:
-                    if self._full_transcript:
-                        self._full_transcript += " " + text
-                    else:
-                        self._full_transcript = text
-
-                    self._loop.call_soon_threadsafe(
-                        self.utterance_queue.put_nowait,
-                        (text, speaker, timestamp_seconds),
-                    )
+                    self._utterances.append(text)
 
-                self._loop.call_soon_threadsafe(
-                    self.interim_queue.put_nowait,
-                    (text, speaker, timestamp_seconds, is_final),
-                )
+                    await self.utterance_queue.put((text, speaker, timestamp_seconds))
+
+                await self._put_interim((text, speaker, timestamp_seconds, is_final))
 
             except Exception as exc:
                 logger.warning("[%s] Transcript handler error: %s", self.lecture_id, exc)
@@ -3,14 +3,87 @@ services/tts_service.py - Smallest AI Text-to-Speech service
 """
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Optional
+import struct
+from typing import Any, AsyncIterator, Optional
 
 from config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# One AsyncWavesClient for the process, entered once, so each synthesis
+# reuses its authenticated connection instead of setting one up per call
+_tts_client: Optional[Any] = None
+_tts_client_lock = asyncio.Lock()
+
+
+async def _get_tts_client() -> Any:
+    global _tts_client
+    async with _tts_client_lock:
+        if _tts_client is None:
+            from smallestai.waves import AsyncWavesClient
+
+            _tts_client = await AsyncWavesClient(api_key=settings.smallest_api_key).__aenter__()
+            logger.info("[TTS] AsyncWavesClient connected")
+        return _tts_client
+
+
+async def close_tts_client() -> None:
+    global _tts_client
+    if _tts_client is not None:
+        client, _tts_client = _tts_client, None
+        await client.__aexit__(None, None, None)
+
+
+def _streaming_wav_header(sample_rate: int) -> bytes:
+    """Header for 16-bit mono PCM of unknown length (sizes set to the maximum,
+    which players treat as "until the stream ends")."""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 0xFFFFFFFF, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", 0xFFFFFFFF,
+    )
+
+
+async def stream_speech(text: str) -> AsyncIterator[bytes]:
+    """
+    Synthesize text to speech, yielding a WAV header and then the audio as
+    each piece of the text is synthesized. Yields nothing on failure.
+    """
+    if not text or not text.strip():
+        logger.warning("[TTS] Empty text provided for synthesis")
+        return
+
+    if not settings.smallest_api_key:
+        logger.error("[TTS] Smallest.ai API key is missing for TTS. Set SMALLEST_API_KEY.")
+        return
+
+    header_sent = False
+    try:
+        client = await _get_tts_client()
+        # stream=True yields headerless PCM, one piece per text chunk
+        chunks = await client.synthesize(
+            text,
+            stream=True,
+            model=settings.smallest_tts_model,
+            voice_id=settings.smallest_tts_voice_id,
+            sample_rate=settings.smallest_tts_sample_rate,
+            speed=settings.smallest_tts_speed,
+        )
+        async for chunk in chunks:
+            if not header_sent:
+                yield _streaming_wav_header(settings.smallest_tts_sample_rate)
+                header_sent = True
+            yield chunk
+    except ImportError as e:
+        logger.error(f"[TTS] smallestai SDK not installed. Run: pip install smallestai. Error: {e}")
+    except Exception as exc:
+        # Once audio has gone out the response can only be cut short
+        logger.error(f"[TTS] TTS streaming failed: {type(exc).__name__}: {str(exc)}", exc_info=True)
+
 
 async def synthesize_speech(text: str) -> Optional[bytes]:
     """
@@ -30,22 +103,18 @@ async def synthesize_speech(text: str) -> Optional[bytes]:
     try:
         logger.info(f"[TTS] Attempting synthesis with model='{settings.smallest_tts_model}', voice='{settings.smallest_tts_voice_id}'")
         
-        from smallestai.waves import AsyncWavesClient
+        client = await _get_tts_client()
+        audio_bytes = await client.synthesize(
+            text,
+            model=settings.smallest_tts_model,
+            voice_id=settings.smallest_tts_voice_id,
+            sample_rate=settings.smallest_tts_sample_rate,
+            speed=settings.smallest_tts_speed,
+            output_format="wav",
+        )
+        logger.info(f"[TTS] Synthesis successful, returned {len(audio_bytes)} bytes of audio")
+        return audio_bytes
 
-        async with AsyncWavesClient(api_key=settings.smallest_api_key) as client:
-            logger.info("[TTS] AsyncWavesClient connected")
-            
-            audio_bytes = await client.synthesize(
-                text,
-                model=settings.smallest_tts_model,
-                voice_id=settings.smallest_tts_voice_id,
-                sample_rate=settings.smallest_tts_sample_rate,
-                speed=settings.smallest_tts_speed,
-                output_format="wav",
-            )
-            logger.info(f"[TTS] Synthesis successful, returned {len(audio_bytes)} bytes of audio")
-            return audio_bytes
-            
     except ImportError as e:
         logger.error(f"[TTS] smallestai SDK not installed. Run: pip install smallestai. Error: {e}")
         return None
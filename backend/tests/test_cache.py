@@ -0,0 +1,183 @@
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Add backend directory to path so we can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services import cache as cache_module
+from services.cache import (
+    ResponseCache,
+    TermCache,
+    cached_response,
+    near_duplicate_key,
+    normalise_term,
+)
+
+
+def _near(term: str) -> str:
+    return near_duplicate_key(normalise_term(term))
+
+
+@pytest.mark.parametrize("variant", [
+    "gradient descent",
+    "Gradient Descent",
+    "gradient-descent",
+    "the gradient descent",
+    "gradient descents",
+    "  gradient   descent ",
+])
+def test_trivial_variants_share_a_key(variant):
+    assert _near(variant) == "gradient descent"
+
+
+@pytest.mark.parametrize("term", ["class", "bus", "gas", "process", "a"])
+def test_words_ending_in_s_that_are_not_plurals_are_kept(term):
+    assert _near(term) == term
+
+
+@pytest.mark.parametrize("term, key", [
+    ("C++", "c++"),
+    ("C#", "c#"),
+    ("C", "c"),
+    ("A* search", "a* search"),
+    ("news", "news"),
+    ("the news", "news"),
+    ("the C", "the c"),
+])
+def test_symbols_and_short_tokens_are_not_folded_away(term, key):
+    assert _near(term) == key
+
+
+def test_c_variants_and_a_star_do_not_collide():
+    keys = {_near(t) for t in ["C", "C++", "C#", "A* search", "search"]}
+    assert len(keys) == 5
+
+
+def test_term_cache_keeps_c_variants_apart():
+    cache = TermCache()
+    cache.put("C++", {"content": "x"})
+    cache.put("search", {"content": "y"})
+    pairs = [(t, normalise_term(t)) for t in ["C", "C#", "A* search", "c++"]]
+    assert cache.filter_new_pairs(pairs) == ["C", "C#", "A* search"]
+
+
+def test_distinct_terms_keep_distinct_keys():
+    assert _near("class") != _near("clas")
+    assert _near("neural network") != _near("neural networking")
+
+
+def test_term_cache_matches_near_duplicates():
+    cache = TermCache()
+    cache.put("Gradient-Descent", {"content": "x"})
+    assert cache.contains("the gradient descents")
+    assert cache.get("gradient descent") == {"content": "x"}
+    assert not cache.contains("gradient")
+
+
+def test_filter_new_pairs_drops_cached_terms_and_repeats():
+    cache = TermCache()
+    cache.put("entropy", {"content": "x"})
+    pairs = [(t, normalise_term(t)) for t in ["The Entropy", "class", "the class", "bus"]]
+    assert cache.filter_new_pairs(pairs) == ["class", "bus"]
+
+
+def test_eviction_forgets_the_near_duplicate_key():
+    cache = TermCache(maxsize=1)
+    cache.put("gradient descent", {"content": "x"})
+    cache.put("entropy", {"content": "y"})
+    assert not cache.contains("gradient descents")
+    assert cache.contains("entropy")
+
+
+# Word sets (words over 3 letters): {alpha, beta, gamma, delta}
+CONTEXT = "alpha beta gamma delta"
+
+
+def test_response_cache_exact_context_hits():
+    cache = ResponseCache()
+    cache.put("define:entropy", CONTEXT, {"content": "x"})
+    assert cache.get("define:entropy", CONTEXT) == {"content": "x"}
+
+
+def test_response_cache_hits_at_the_similarity_threshold():
+    cache = ResponseCache()
+    cache.put("define:entropy", CONTEXT, {"content": "x"})
+    # 3 shared of 6 distinct words: exactly CONTEXT_SIMILARITY_MIN
+    assert cache_module.CONTEXT_SIMILARITY_MIN == 0.5
+    assert cache.get("define:entropy", "alpha beta gamma epsilon zeta") == {"content": "x"}
+
+
+def test_response_cache_misses_below_the_similarity_threshold():
+    cache = ResponseCache()
+    cache.put("define:entropy", CONTEXT, {"content": "x"})
+    # 2 shared of 6 distinct words
+    assert cache.get("define:entropy", "alpha beta epsilon zeta") is None
+    assert cache.get("define:enthalpy", CONTEXT) is None
+
+
+def test_response_cache_ignores_short_words_and_case():
+    cache = ResponseCache()
+    cache.put("define:entropy", CONTEXT, {"content": "x"})
+    assert cache.get("define:entropy", "Alpha, BETA and the gamma; delta!") == {"content": "x"}
+
+
+def test_response_cache_prefers_the_newest_similar_entry():
+    cache = ResponseCache()
+    cache.put("define:entropy", CONTEXT, {"content": "old"})
+    cache.put("define:entropy", "alpha beta gamma epsilon", {"content": "new"})
+    assert cache.get("define:entropy", "alpha beta gamma zeta") == {"content": "new"}
+
+
+def test_response_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(ttl=60)
+    cache.put("define:entropy", CONTEXT, {"content": "x"})
+    now[0] += 59
+    assert cache.get("define:entropy", CONTEXT) is not None
+    now[0] += 1
+    assert cache.get("define:entropy", CONTEXT) is None
+
+
+def test_cached_response_reuses_results_for_the_same_term(monkeypatch):
+    monkeypatch.setattr(cache_module, "_response_cache", ResponseCache())
+    calls = []
+
+    @cached_response("define")
+    async def fetch(term, context):
+        calls.append(term)
+        return {"term": term, "content": "x"} if term != "nothing" else None
+
+    async def run():
+        first = await fetch("Gradient Descent", CONTEXT)
+        second = await fetch("gradient  descent", CONTEXT)
+        await fetch("nothing", CONTEXT)
+        await fetch("nothing", CONTEXT)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == {"term": "Gradient Descent", "content": "x"}
+    # Empty results are not cached
+    assert calls == ["Gradient Descent", "nothing", "nothing"]
+
+
+def test_cached_response_never_serves_another_terms_answer(monkeypatch):
+    monkeypatch.setattr(cache_module, "_response_cache", ResponseCache())
+
+    @cached_response("define")
+    async def fetch(term, context):
+        return {"term": term, "content": f"about {term}"}
+
+    async def run():
+        return [await fetch(t, CONTEXT) for t in ["C++", "C#", "the gradient descents", "gradient descent"]]
+
+    assert [r["content"] for r in asyncio.run(run())] == [
+        "about C++", "about C#", "about the gradient descents", "about gradient descent",
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
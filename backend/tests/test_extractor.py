@@ -0,0 +1,118 @@
+import asyncio
+import json
+import sys
+import os
+
+import pytest
+
+# Add backend directory to path so we can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.extractor import _close_truncated_json, _parse_analysis, coalesce_stream
+
+
+async def _stream(chunks, gaps=None, error=None):
+    for i, chunk in enumerate(chunks):
+        if gaps:
+            await asyncio.sleep(gaps[i])
+        yield chunk
+    if error:
+        raise error
+
+
+async def _collect_timed(stream):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    return [(piece, loop.time() - start) async for piece in stream]
+
+
+def test_fast_chunks_are_joined_up_to_min_chars():
+    async def run():
+        chunks = ["ab"] * 50
+        return [p async for p in coalesce_stream(_stream(chunks), min_chars=10, max_delay=1.0)]
+
+    pieces = asyncio.run(run())
+    assert "".join(pieces) == "ab" * 50
+    assert all(len(p) == 10 for p in pieces)
+
+
+def test_short_tail_is_flushed_at_the_end():
+    async def run():
+        return [p async for p in coalesce_stream(_stream(["abc", "de"]), min_chars=40, max_delay=1.0)]
+
+    assert asyncio.run(run()) == ["abcde"]
+
+
+def test_buffer_is_flushed_when_max_delay_passes():
+    async def run():
+        stream = _stream(["ab", "cd"], gaps=[0, 0.3])
+        return await _collect_timed(coalesce_stream(stream, min_chars=40, max_delay=0.05))
+
+    pieces = asyncio.run(run())
+    assert [p for p, _ in pieces] == ["ab", "cd"]
+    # "ab" went out after max_delay, without waiting for "cd"
+    assert 0.04 <= pieces[0][1] < 0.25
+    assert pieces[1][1] >= 0.3
+
+
+def test_delay_counts_from_the_first_buffered_chunk():
+    async def run():
+        stream = _stream(["a", "b", "c"], gaps=[0, 0.03, 0.03])
+        return await _collect_timed(coalesce_stream(stream, min_chars=40, max_delay=0.05))
+
+    pieces = asyncio.run(run())
+    assert "".join(p for p, _ in pieces) == "abc"
+    # "a" and "b" share the window opened by "a"; "c" arrives after it
+    assert pieces[0][0] == "ab"
+    assert pieces[0][1] < 0.055 + 0.03
+
+
+def test_error_is_raised_after_buffered_text():
+    async def run():
+        pieces = []
+        with pytest.raises(RuntimeError):
+            async for piece in coalesce_stream(
+                _stream(["abc"], error=RuntimeError("boom")), min_chars=40, max_delay=1.0
+            ):
+                pieces.append(piece)
+        return pieces
+
+    assert asyncio.run(run()) == ["abc"]
+
+
+@pytest.mark.parametrize("raw, repaired", [
+    # Cut inside a string value: back to the last complete value
+    ('{"topic": "Entropy", "summ', {"topic": "Entropy"}),
+    ('{"topic": "Entropy", "takeaway": "say \\"hi\\" {ok}', {"topic": "Entropy"}),
+    # A number with nothing after it may be incomplete, so it is dropped
+    ('{"topic": "Entropy", "emphasis_level": 0.8', {"topic": "Entropy"}),
+    ('{"topic": "Entropy", "emphasis_level": 0.8,', {"topic": "Entropy", "emphasis_level": 0.8}),
+    # Open arrays and objects are closed
+    ('Reply: {"topic": "A", "terms": [', {"topic": "A", "terms": []}),
+    (
+        '{"terms": [{"term": "heat", "type": "concept"}, {"term": "entr',
+        {"terms": [{"term": "heat", "type": "concept"}, {}]},
+    ),
+])
+def test_close_truncated_json(raw, repaired):
+    assert json.loads(_close_truncated_json(raw)) == repaired
+
+
+def test_close_truncated_json_leaves_text_without_an_object():
+    assert _close_truncated_json("no json here") == "no json here"
+
+
+def test_parse_analysis_salvages_a_truncated_reply():
+    result = _parse_analysis('{"topic": "Entropy", "terms": [{"term": "heat"}, {"term": "entr')
+    assert result.topic == "Entropy"
+    assert [t.term for t in result.terms] == ["heat", ""]
+    assert result.emphasis_level == 0.5
+
+
+def test_parse_analysis_keeps_a_complete_reply():
+    result = _parse_analysis('{"topic": "Entropy", "emphasis_level": 0.9, "takeaway": "Disorder grows"}')
+    assert (result.topic, result.emphasis_level, result.takeaway) == ("Entropy", 0.9, "Disorder grows")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
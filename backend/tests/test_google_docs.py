@@ -0,0 +1,63 @@
+import sys
+import os
+
+import pytest
+
+# Add backend directory to path so we can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.google_docs_service import GoogleDocsService
+
+
+def _build(title, summary, takeaways=(), definitions=(), deep_research=()):
+    # _build_requests needs no API client, so skip __init__'s credentials
+    service = GoogleDocsService.__new__(GoogleDocsService)
+    return service._build_requests(
+        "doc", title, summary, list(definitions), list(takeaways), list(deep_research)
+    )
+
+
+def _styled_text(requests):
+    """Text under each style range, cut by UTF-16 index like Docs does."""
+    text = requests[0]["insertText"]["text"].encode("utf-16-le")
+    spans = []
+    for request in requests[1:]:
+        r = request["updateTextStyle"]["range"]
+        # The body starts at index 1; each code unit is 2 bytes
+        spans.append(text[(r["startIndex"] - 1) * 2:(r["endIndex"] - 1) * 2].decode("utf-16-le"))
+    return spans
+
+
+def test_ascii_ranges_cover_the_headings():
+    requests = _build("Thermodynamics", "Heat flows.", takeaways=["Entropy rises"])
+    assert requests[0]["insertText"]["location"] == {"index": 1}
+    assert _styled_text(requests) == ["Thermodynamics", "LECTURE SUMMARY", "KEY TAKEAWAYS"]
+    assert requests[1]["updateTextStyle"]["range"] == {"startIndex": 1, "endIndex": 15}
+
+
+def test_emoji_count_as_two_code_units():
+    requests = _build(
+        "Thermo \U0001F525 day",
+        "Ice ❄️ melts \U0001F9CA\U0001F4A7.",
+        takeaways=["ΔS ≥ 0 \U0001F4C8"],
+        definitions=[{"term": "Café \U0001F600", "type": "concept", "definition": "☕"}],
+        deep_research=[{"query": "\U0001F30D", "synthesis": "résumé"}],
+    )
+    assert _styled_text(requests) == [
+        "Thermo \U0001F525 day",
+        "LECTURE SUMMARY",
+        "KEY TAKEAWAYS",
+        "KEY CONCEPTS",
+        "RESEARCH INSIGHTS",
+    ]
+    # "Thermo " + one surrogate pair + " day": 7 + 2 + 4 code units
+    assert requests[1]["updateTextStyle"]["range"] == {"startIndex": 1, "endIndex": 14}
+
+
+def test_takeaways_use_a_bullet():
+    requests = _build("T", "S", takeaways=["one", "two"])
+    assert "• one\n• two\n" in requests[0]["insertText"]["text"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import os
+
+# Add backend directory to path so we can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.smallest_service import SmallestSession
+
+
+def _session(maxsize: int) -> SmallestSession:
+    session = SmallestSession("test_interim_queue", asyncio.get_running_loop())
+    session.interim_queue = asyncio.Queue(maxsize=maxsize)
+    return session
+
+
+def _drain(queue: asyncio.Queue) -> list:
+    return [queue.get_nowait() for _ in range(queue.qsize())]
+
+
+def test_full_queue_drops_oldest_interim_not_final():
+    async def run():
+        session = _session(3)
+        await session._put_interim(("final", None, 0, True))
+        await session._put_interim(("interim a", None, 1, False))
+        await session._put_interim(("interim b", None, 2, False))
+        await session._put_interim(("interim c", None, 3, False))
+        return session
+
+    session = asyncio.run(run())
+    assert [item[0] for item in _drain(session.interim_queue)] == ["final", "interim b", "interim c"]
+    assert session.interim_dropped == 1
+
+
+def test_queue_of_finals_drops_new_interim():
+    async def run():
+        session = _session(2)
+        await session._put_interim(("final 1", None, 0, True))
+        await session._put_interim(("final 2", None, 1, True))
+        await session._put_interim(("interim", None, 2, False))
+        return session
+
+    session = asyncio.run(run())
+    assert [item[0] for item in _drain(session.interim_queue)] == ["final 1", "final 2"]
+    assert session.interim_dropped == 1
+
+
+def test_queue_of_finals_makes_final_wait():
+    async def run():
+        session = _session(1)
+        await session._put_interim(("final 1", None, 0, True))
+        put = asyncio.create_task(session._put_interim(("final 2", None, 1, True)))
+        await asyncio.sleep(0)
+        assert not put.done()
+        first = await session.interim_queue.get()
+        await put
+        second = session.interim_queue.get_nowait()
+        return session, [first[0], second[0]]
+
+    session, texts = asyncio.run(run())
+    assert texts == ["final 1", "final 2"]
+    assert session.interim_dropped == 0
+
+
+if __name__ == "__main__":
+    test_full_queue_drops_oldest_interim_not_final()
+    test_queue_of_finals_drops_new_interim()
+    test_queue_of_finals_makes_final_wait()
+    print("✅ Interim queue tests passed")
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+# Add backend directory to path so we can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from db.database import Base, get_db
+from models.lecture import utcnow
+from routers import lectures
+
+
+@pytest.fixture
+def client(tmp_path):
+    """The lectures router on a fresh SQLite database."""
+    # NullPool: the TestClient runs the app on its own event loop
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+
+    async def test_db():
+        async with factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(lectures.router)
+    app.dependency_overrides[get_db] = test_db
+    yield TestClient(app)
+    asyncio.run(engine.dispose())
+
+
+def _updated_at(lecture: dict) -> datetime:
+    return datetime.fromisoformat(lecture["updated_at"])
+
+
+def test_utcnow_keeps_microseconds():
+    stamps = {utcnow() for _ in range(5)}
+    assert any(stamp.microsecond for stamp in stamps)
+    assert all(stamp.tzinfo is None for stamp in stamps)
+
+
+@pytest.mark.parametrize("body", [{}, {"title": "Thermo"}])
+def test_patch_always_touches_updated_at(client, body):
+    created = client.post("/api/lectures/", json={"title": "Thermo"}).json()
+    patched = client.patch(f"/api/lectures/{created['id']}", json=body).json()
+    assert _updated_at(patched) > _updated_at(created)
+    assert patched["created_at"] == created["created_at"]
+
+
+def test_lectures_created_within_a_second_list_newest_first(client):
+    ids = [client.post("/api/lectures/", json={"title": f"L{i}"}).json()["id"] for i in range(3)]
+    listed = [lecture["id"] for lecture in client.get("/api/lectures/").json()]
+    assert listed == ids[::-1]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,112 @@
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Add backend directory to path so we can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services import ratelimit
+from services.ratelimit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", fake)
+    return fake
+
+
+def test_full_bucket_serves_rpm_calls_then_refuses(clock):
+    bucket = TokenBucket(rpm=3, tpm=1000)
+    assert [bucket.try_acquire(10) for _ in range(4)] == [True, True, True, False]
+
+
+def test_token_budget_limits_calls(clock):
+    bucket = TokenBucket(rpm=100, tpm=100)
+    assert bucket.try_acquire(60)
+    assert not bucket.try_acquire(60)
+    assert bucket.try_acquire(40)
+
+
+def test_refill_is_continuous_and_capped(clock):
+    bucket = TokenBucket(rpm=60, tpm=6000)
+    for _ in range(60):
+        assert bucket.try_acquire(0)
+    assert not bucket.try_acquire(0)
+
+    clock.now += 1.0  # one request's worth at 60 rpm
+    assert bucket.try_acquire(0)
+    assert not bucket.try_acquire(0)
+
+    clock.now += 3600  # an hour idle still refills only to a full bucket
+    assert sum(bucket.try_acquire(0) for _ in range(100)) == 60
+
+
+def test_spare_requests_are_left_for_others(clock):
+    bucket = TokenBucket(rpm=5, tpm=1000)
+    assert bucket.try_acquire(0, spare_requests=3)
+    assert bucket.try_acquire(0, spare_requests=3)
+    assert not bucket.try_acquire(0, spare_requests=3)
+    assert bucket.try_acquire(0)
+
+
+def test_backoff_doubles_until_reset(clock):
+    bucket = TokenBucket(rpm=60, tpm=6000)
+    bucket.backoff()
+    assert not bucket.try_acquire(0)
+    clock.now += 1.0
+    assert bucket.try_acquire(0)
+
+    bucket.backoff()  # second in a row: 2s
+    clock.now += 1.5
+    assert not bucket.try_acquire(0)
+    clock.now += 0.5
+    assert bucket.try_acquire(0)
+
+    bucket.reset_backoff()
+    bucket.backoff()  # back to 1s
+    clock.now += 1.0
+    assert bucket.try_acquire(0)
+
+
+def test_retry_after_sets_the_pause_and_never_shortens_one(clock):
+    bucket = TokenBucket(rpm=60, tpm=6000)
+    bucket.backoff(retry_after=10)
+    bucket.backoff(retry_after=2)
+    clock.now += 9.0
+    assert not bucket.try_acquire(0)
+    clock.now += 1.0
+    assert bucket.try_acquire(0)
+
+
+def test_retry_after_is_capped(clock):
+    bucket = TokenBucket(rpm=60, tpm=6000)
+    bucket.backoff(retry_after=3600)
+    clock.now += ratelimit._MAX_BACKOFF_SECONDS
+    assert bucket.try_acquire(0)
+
+
+def test_acquire_waits_for_refill():
+    async def run() -> float:
+        bucket = TokenBucket(rpm=6000, tpm=1_000_000)  # one request per 10ms
+        await bucket.acquire(0, requests=6000)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await bucket.acquire(0)
+        return loop.time() - start
+
+    assert 0.005 <= asyncio.run(run()) < 0.5
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
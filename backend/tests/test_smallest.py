@@ -26,7 +26,7 @@ async def test_smallest_live():
     loop = asyncio.get_running_loop()
     lecture_id = "test_session_live"
     
-    # 1. Create the session (starts the Smallest.ai thread)
+    # 1. Create the session (opens the Smallest.ai connection in a task)
     print(f"🔌 Connecting to Smallest.ai session: {lecture_id}...")
     stt_session = get_or_create_session(lecture_id, loop)
     
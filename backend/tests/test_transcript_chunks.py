@@ -0,0 +1,95 @@
+import asyncio
+import sys
+import os
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Add backend directory to path so we can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from db.database import Base
+from models.lecture import Lecture, TranscriptChunk
+from routers import ws
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    """A fresh SQLite database for the handler's module-level helpers."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with factory() as db:
+            db.add(Lecture(id="L1", title="Thermo"))
+            await db.commit()
+
+    asyncio.run(setup())
+    monkeypatch.setattr(ws, "AsyncSessionLocal", factory)
+    yield factory
+    asyncio.run(engine.dispose())
+
+
+async def _save_chunks(factory, texts):
+    """What periodic_transcript_save does for one connection."""
+    seq = await ws._next_transcript_seq("L1")
+    async with factory() as db:
+        for i, text in enumerate(texts):
+            if seq and i == 0:
+                text = f" {text}"  # continues an earlier connection's text
+            db.add(TranscriptChunk(lecture_id="L1", seq=seq + i, text=text))
+        await db.commit()
+
+
+async def _lecture(factory):
+    async with factory() as db:
+        lecture = await db.get(Lecture, "L1")
+        chunks = (await db.scalars(select(TranscriptChunk))).all()
+    return lecture, chunks
+
+
+def test_finalize_after_reconnect_keeps_the_crashed_connections_text(sessions):
+    async def run():
+        # First connection saves two chunks, then the process dies: no finalize
+        await _save_chunks(sessions, ["hello world", " this is part one"])
+        # The reconnect numbers on from them and saves its own chunk
+        assert await ws._next_transcript_seq("L1") == 2
+        await _save_chunks(sessions, ["part two"])
+        # It ends with some text not yet saved as a chunk
+        await ws._finalize_lecture("L1", 60, "Summary", " and the end")
+        return await _lecture(sessions)
+
+    lecture, chunks = asyncio.run(run())
+    assert lecture.transcript == "hello world this is part one part two and the end"
+    assert lecture.status == "completed"
+    assert lecture.summary == "Summary"
+    assert chunks == []
+
+
+def test_finalize_without_saved_chunks_uses_the_unsaved_text(sessions):
+    async def run():
+        await ws._finalize_lecture("L1", 2, None, "short lecture")
+        return await _lecture(sessions)
+
+    lecture, _ = asyncio.run(run())
+    assert lecture.transcript == "short lecture"
+
+
+def test_second_finalize_keeps_the_transcript(sessions):
+    async def run():
+        await _save_chunks(sessions, ["hello world"])
+        await ws._finalize_lecture("L1", 60, None, " more")
+        # The disconnect path finalizes again with nothing new
+        await ws._finalize_lecture("L1", 61, None, "")
+        return await _lecture(sessions)
+
+    lecture, _ = asyncio.run(run())
+    assert lecture.transcript == "hello world more"
+    assert lecture.duration_seconds == 61
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -33,7 +33,7 @@ fi
 # Start Backend
 echo "📦 Starting Backend (Port 8000)..."
 source backend/.venv/bin/activate
-(cd backend && uvicorn main:app --reload --port 8000) &
+(cd backend && uvicorn main:app --reload --loop uvloop --ws-per-message-deflate true --port 8000) &
 BACKEND_PID=$!
 echo "✅ Backend started (PID: $BACKEND_PID)"
 
@@ -60,64 +60,81 @@ export function useAudioStream(lectureId: string | undefined) {
                 toast.error('Connection error');
             };
 
-            ws.onmessage = (event) => {
-                try {
-                    const data = JSON.parse(event.data);
-
-                    switch (data.type) {
-                        case 'transcript_final':
+            const handleMessage = (data: any) => {
+                switch (data.type) {
+                    case 'transcript_final':
+                        setState(prev => ({
+                            ...prev,
+                            transcript: prev.transcript + (prev.transcript ? ' ' : '') + data.text
+                        }));
+                        break;
+
+                    // case 'transcript_interim': 
+                    //   // Optional: Handle interim results if you want to show them floating
+                    //   break;
+
+                    case 'new_card':
+                        if (data.card.type === 'deep_research') {
                             setState(prev => ({
                                 ...prev,
-                                transcript: prev.transcript + (prev.transcript ? ' ' : '') + data.text
-                            }));
-                            break;
-
-                        // case 'transcript_interim': 
-                        //   // Optional: Handle interim results if you want to show them floating
-                        //   break;
-
-                        case 'new_card':
-                            if (data.card.type === 'deep_research') {
-                                setState(prev => ({
-                                    ...prev,
-                                    deepResearchCards: [data.card, ...prev.deepResearchCards]
-                                }));
-                            } else {
-                                setState(prev => ({
-                                    ...prev,
-                                    definitions: [data.card, ...prev.definitions]
-                                }));
-                            }
-                            break;
-
-                        case 'new_takeaway':
-                            setState(prev => ({
-                                ...prev,
-                                takeaways: [...prev.takeaways, data.takeaway.text]
+                                deepResearchCards: [data.card, ...prev.deepResearchCards]
                             }));
-                            break;
-
-                        case 'topic_update':
+                        } else {
                             setState(prev => ({
                                 ...prev,
-                                topic: data.topic,
-                                emphasisLevel: Math.round(data.emphasis_level * 100)
+                                definitions: [data.card, ...prev.definitions]
                             }));
-                            break;
+                        }
+                        break;
+
+                    case 'new_takeaway':
+                        setState(prev => ({
+                            ...prev,
+                            takeaways: [...prev.takeaways, data.takeaway.text]
+                        }));
+                        break;
+
+                    case 'topic_update':
+                        setState(prev => ({
+                            ...prev,
+                            topic: data.topic,
+                            emphasisLevel: Math.round(data.emphasis_level * 100)
+                        }));
+                        break;
+
+                    case 'summary_update':
+                        setState(prev => ({
+                            ...prev,
+                            summary: data.summary
+                        }));
+                        break;
+
+                    // Final summary streamed token by token at session end
+                    case 'summary_delta':
+                        setState(prev => ({
+                            ...prev,
+                            summary: (data.reset ? '' : prev.summary) + data.text
+                        }));
+                        break;
+
+                    case 'deep_research_result':
+                        setState(prev => ({
+                            ...prev,
+                            deepResearchCards: [data.card, ...prev.deepResearchCards]
+                        }));
+                        break;
+                }
+            };
 
-                        case 'summary_update':
-                            setState(prev => ({
-                                ...prev,
-                                summary: data.summary
-                            }));
-                            break;
+            ws.onmessage = (event) => {
+                try {
+                    const data = JSON.parse(event.data);
 
-                        case 'deep_research_result':
-                            setState(prev => ({
-                                ...prev,
-                                deepResearchCards: [data.card, ...prev.deepResearchCards]
-                            }));
-                            break;
+                    // The backend coalesces bursts of events into one frame
+                    if (data.type === 'batch') {
+                        data.items.forEach(handleMessage);
+                    } else {
+                        handleMessage(data);
                     }
                 } catch (e) {
                     console.error('Error parsing message:', e);